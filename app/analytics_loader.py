@@ -3,9 +3,30 @@ Simple analytics data loader - just a switch for categories to files.
 """
 
 import os
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from baml_client.types import AnalyticsCategory
 
+# Report contents keyed by path, tagged with the file's mtime so a
+# regenerated report is picked up on the next request
+_report_cache: Dict[str, Tuple[int, str]] = {}
+
+
+def _read_report(file_path: str) -> Optional[str]:
+    """Return a report's contents, re-reading the file only when it has changed."""
+    try:
+        mtime = os.stat(file_path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+    cached = _report_cache.get(file_path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    with open(file_path, "r") as f:
+        content = f.read()
+    _report_cache[file_path] = (mtime, content)
+    return content
+
 
 def get_analytics_data_for_category(
     analytics_category: AnalyticsCategory, analytics_dir: str = "analytics_reports"
@@ -44,10 +65,9 @@ def get_analytics_data_for_category(
     for filename in filenames:
         file_path = os.path.join(analytics_dir, filename)
         try:
-            if os.path.exists(file_path):
-                with open(file_path, "r") as f:
-                    content = f.read()
-                    content_parts.append(content)
+            content = _read_report(file_path)
+            if content is not None:
+                content_parts.append(content)
         except Exception as e:
             print(f"Error loading {filename}: {e}")
             continue
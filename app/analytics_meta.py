@@ -0,0 +1,32 @@
+"""
+Data-source metadata for analytics functions.
+
+The analytics report generator reads this metadata to explain where a report's
+data comes from when the report cannot be produced.
+"""
+
+from typing import Callable, TypeVar
+
+F = TypeVar("F", bound=Callable)
+
+BIGQUERY_SOURCE = "BigQuery"
+BIGQUERY_REQUIREMENTS = "Google Cloud credentials and BigQuery access"
+
+AZURE_SOURCE = "Azure SQL Database"
+AZURE_REQUIREMENTS = "Azure SQL Database connection and credentials"
+
+
+def analytics_meta(
+    source: str, description: str, requirements: str
+) -> Callable[[F], F]:
+    """Attach source, description and requirements to an analytics function."""
+
+    def decorator(func: F) -> F:
+        func._analytics_meta = {
+            "source": source,
+            "description": description,
+            "requirements": requirements,
+        }
+        return func
+
+    return decorator
@@ -2,7 +2,9 @@
 Authentication utilities for the ParentPass Chatbot API.
 """
 
+import hmac
 import os
+from functools import lru_cache
 from fastapi import Request, Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
@@ -13,12 +15,21 @@ load_dotenv()
 security = HTTPBearer()
 
 
-def verify_api_key(credentials: HTTPAuthorizationCredentials = Depends(security)):
+@lru_cache(maxsize=1)
+def _encode_key(api_key: str) -> bytes:
+    """Encode the configured key once; re-encodes only if PP_API_KEY changes."""
+    return api_key.encode()
+
+
+async def verify_api_key(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Verify API key."""
     expected_api_key = os.getenv("PP_API_KEY")
     if not expected_api_key:
         raise HTTPException(status_code=500, detail="PP_API_KEY not configured")
-    if credentials.credentials != expected_api_key:
+    # Constant-time comparison; compare bytes so non-ASCII tokens cannot raise
+    if not hmac.compare_digest(
+        credentials.credentials.encode(), _encode_key(expected_api_key)
+    ):
         raise HTTPException(status_code=403, detail="Invalid API key")
     return credentials.credentials
 
@@ -1,14 +1,24 @@
 from typing import Dict, Any, Optional
 from datetime import datetime, timedelta
-from database import AzureSQLReadOnlyConnection
+from database import ConnectionPool, connection_pool
+from analytics_meta import AZURE_REQUIREMENTS, AZURE_SOURCE, analytics_meta
 
 
 class AzureAnalytics:
     """Azure SQL Database analytics for ParentPass community data"""
 
-    def __init__(self, db_connection: Optional[AzureSQLReadOnlyConnection] = None):
-        self.db = db_connection or AzureSQLReadOnlyConnection()
+    def __init__(self, db_pool: Optional[ConnectionPool] = None):
+        self.db_pool = db_pool or connection_pool
 
+    def _execute_query(self, query: str, params: Optional[tuple] = None):
+        """Run a read-only query on a connection borrowed from the pool"""
+        return self.db_pool.execute_query(query, params)
+
+    @analytics_meta(
+        source=AZURE_SOURCE,
+        description="New user registrations across time periods",
+        requirements=AZURE_REQUIREMENTS,
+    )
     def get_new_user_stats(self, days_back: int = 30) -> Dict[str, Any]:
         """
         Get new user registration statistics for different time periods.
@@ -161,7 +171,7 @@ class AzureAnalytics:
         """
 
         try:
-            results = self.db.execute_query(query)
+            results = self._execute_query(query)
 
             # Organize results by period type for better structure
             organized_results = {
@@ -190,6 +200,11 @@ class AzureAnalytics:
             print(f"Error getting new user stats: {e}")
             return {"rolling_periods": {}, "calendar_periods": {}, "all_periods": {}}
 
+    @analytics_meta(
+        source=AZURE_SOURCE,
+        description="Long-term user registration patterns and trends",
+        requirements=AZURE_REQUIREMENTS,
+    )
     def get_historical_user_registration_data(
         self, period_type: str = "month", periods_back: int = 12
     ) -> Dict[str, Any]:
@@ -359,7 +374,7 @@ class AzureAnalytics:
             """
 
         try:
-            results = self.db.execute_query(query, (periods_back - 1,))
+            results = self._execute_query(query, (periods_back - 1,))
 
             # Process results into a structured format
             historical_data = []
@@ -444,6 +459,11 @@ class AzureAnalytics:
                 "historical_data": [],
             }
 
+    @analytics_meta(
+        source=AZURE_SOURCE,
+        description="Content creation activity: activities, posts, freebies",
+        requirements=AZURE_REQUIREMENTS,
+    )
     def get_content_creation_stats(self, days_back: int = 7) -> Dict[str, Any]:
         """
         Get statistics on new content creation (activities, posts, freebies).
@@ -531,7 +551,7 @@ class AzureAnalytics:
 
         try:
             params = tuple([cutoff_date] * 6)  # Same date for all 6 queries
-            results = self.db.execute_query(query, params)
+            results = self._execute_query(query, params)
 
             # Organize results
             stats = {
@@ -560,6 +580,11 @@ class AzureAnalytics:
             print(f"Error getting content creation stats: {e}")
             return {}
 
+    @analytics_meta(
+        source=AZURE_SOURCE,
+        description="User distribution across neighborhoods",
+        requirements=AZURE_REQUIREMENTS,
+    )
     def get_neighborhood_stats(self, days_back: int = 30) -> Dict[str, Any]:
         """
         Get high-level neighborhood statistics.
@@ -614,7 +639,7 @@ class AzureAnalytics:
         """
 
         try:
-            results = self.db.execute_query(query)
+            results = self._execute_query(query)
 
             if results:
                 stats = results[0]
@@ -637,6 +662,11 @@ class AzureAnalytics:
             print(f"Error getting neighborhood stats: {e}")
             return {}
 
+    @analytics_meta(
+        source=AZURE_SOURCE,
+        description="Community interaction through posts and comments",
+        requirements=AZURE_REQUIREMENTS,
+    )
     def get_post_engagement_stats(self, days_back: int = 30) -> Dict[str, Any]:
         """
         Get post and comment engagement statistics.
@@ -696,7 +726,7 @@ class AzureAnalytics:
 
         try:
             params = (cutoff_date, cutoff_date, cutoff_date)
-            results = self.db.execute_query(query, params)
+            results = self._execute_query(query, params)
 
             if results:
                 stats = results[0]
@@ -713,6 +743,11 @@ class AzureAnalytics:
             print(f"Error getting post engagement stats: {e}")
             return {}
 
+    @analytics_meta(
+        source=AZURE_SOURCE,
+        description="Scheduled events and neighborhood participation",
+        requirements=AZURE_REQUIREMENTS,
+    )
     def get_event_stats(self, days_ahead: int = 30) -> Dict[str, Any]:
         """
         Get high-level statistics about upcoming events.
@@ -755,7 +790,7 @@ class AzureAnalytics:
 
         try:
             params = (week_ahead, week_ahead, end_date, end_date)
-            results = self.db.execute_query(query, params)
+            results = self._execute_query(query, params)
 
             if results:
                 stats = results[0]
@@ -1,8 +1,11 @@
 from google.cloud import bigquery
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
+import hashlib
 import json
+import orjson
 import os
+import shutil
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -12,9 +15,11 @@ load_dotenv()
 # Import Azure analytics
 try:
     from .azure_analytics import AzureAnalytics
+    from .analytics_meta import BIGQUERY_REQUIREMENTS, BIGQUERY_SOURCE, analytics_meta
 except ImportError:
     # Fallback for direct script execution
     from azure_analytics import AzureAnalytics
+    from analytics_meta import BIGQUERY_REQUIREMENTS, BIGQUERY_SOURCE, analytics_meta
 
 # Get BigQuery project and dataset from environment
 BQ_PROJECT = os.getenv("BQ_PROJECT")
@@ -36,6 +41,11 @@ def get_bq_table_name() -> str:
     return BQ_TABLE_PREFIX
 
 
+@analytics_meta(
+    source=BIGQUERY_SOURCE,
+    description="User time spent by app section from Firebase Analytics",
+    requirements=BIGQUERY_REQUIREMENTS,
+)
 def time_spent_by_section(
     grouper: str = "%Y-%m-%d %H:00:00",
     timestamp_from: Optional[datetime] = None,
@@ -151,6 +161,11 @@ def time_spent_by_section(
         raise Exception(f"BigQuery error in time_spent_by_section: {str(e)}")
 
 
+@analytics_meta(
+    source=BIGQUERY_SOURCE,
+    description="Most engaged users usage patterns",
+    requirements=BIGQUERY_REQUIREMENTS,
+)
 def top_users_by_time_spent(
     timestamp_from: Optional[datetime] = None,
     timestamp_to: Optional[datetime] = None,
@@ -237,6 +252,11 @@ def top_users_by_time_spent(
         raise Exception(f"BigQuery error in top_users_by_time_spent: {str(e)}")
 
 
+@analytics_meta(
+    source=BIGQUERY_SOURCE,
+    description="App engagement time by user type (guest vs registered)",
+    requirements=BIGQUERY_REQUIREMENTS,
+)
 def time_spent_in_app(
     grouper: str = "%Y-%m-%d %H:00:00",
     timestamp_from: Optional[datetime] = None,
@@ -324,6 +344,11 @@ def time_spent_in_app(
         raise Exception(f"BigQuery error in time_spent_in_app: {str(e)}")
 
 
+@analytics_meta(
+    source=BIGQUERY_SOURCE,
+    description="User navigation patterns from home screen",
+    requirements=BIGQUERY_REQUIREMENTS,
+)
 def section_visit(
     grouper: str = "%Y-%m-%d %H:00:00",
     timestamp_from: Optional[datetime] = None,
@@ -414,6 +439,11 @@ def section_visit(
         raise Exception(f"BigQuery error in section_visit: {str(e)}")
 
 
+@analytics_meta(
+    source=BIGQUERY_SOURCE,
+    description="Search behavior and popular search terms",
+    requirements=BIGQUERY_REQUIREMENTS,
+)
 def search_statistics(
     timestamp_from: Optional[datetime] = None,
     timestamp_to: Optional[datetime] = None,
@@ -495,6 +525,11 @@ def search_statistics(
         raise Exception(f"BigQuery error in search_statistics: {str(e)}")
 
 
+@analytics_meta(
+    source=BIGQUERY_SOURCE,
+    description="Push notification delivery and open rates",
+    requirements=BIGQUERY_REQUIREMENTS,
+)
 def push_notification(
     grouper: str = "%Y-%m-%d %H:00:00",
     timestamp_from: Optional[datetime] = None,
@@ -693,6 +728,11 @@ def event_count(
         raise Exception(f"BigQuery error in event_count: {str(e)}")
 
 
+@analytics_meta(
+    source=BIGQUERY_SOURCE,
+    description="Average time to complete user onboarding",
+    requirements=BIGQUERY_REQUIREMENTS,
+)
 def average_onboarding_time(
     bigquery_client: Optional[bigquery.Client] = None
 ) -> Optional[float]:
@@ -767,6 +807,11 @@ def average_onboarding_time(
         raise Exception(f"BigQuery error in average_onboarding_time: {str(e)}")
 
 
+@analytics_meta(
+    source=BIGQUERY_SOURCE,
+    description="Average total time users spend in app",
+    requirements=BIGQUERY_REQUIREMENTS,
+)
 def average_appactivity_time(
     bigquery_client: Optional[bigquery.Client] = None
 ) -> Optional[float]:
@@ -828,6 +873,11 @@ def average_appactivity_time(
         raise Exception(f"BigQuery error in average_appactivity_time: {str(e)}")
 
 
+@analytics_meta(
+    source=BIGQUERY_SOURCE,
+    description="Daily, Weekly, and Monthly Active User counts",
+    requirements=BIGQUERY_REQUIREMENTS,
+)
 def active_total_users(
     bigquery_client: Optional[bigquery.Client] = None
 ) -> List[Dict[str, Any]]:
@@ -923,6 +973,36 @@ def active_total_users(
         raise Exception(f"BigQuery error in active_total_users: {str(e)}")
 
 
+def _file_digest(path: Path) -> bytes:
+    """Return a short content hash of a file."""
+    return hashlib.blake2b(path.read_bytes(), digest_size=16).digest()
+
+
+def _publish(src: Path, dst: Path) -> None:
+    """
+    Atomically expose a freshly written report under a "latest" name.
+
+    Hardlinks src when possible so the bytes are written only once, and falls
+    back to shutil.copyfile (a kernel-side copy on Linux) across filesystems.
+    If dst already holds identical bytes it is left untouched, so its mtime
+    (and any cache keyed on it) survives a rerun with unchanged data.
+    """
+    try:
+        same_size = dst.stat().st_size == src.stat().st_size
+    except FileNotFoundError:
+        same_size = False
+    if same_size and _file_digest(dst) == _file_digest(src):
+        return
+
+    tmp = dst.with_name(dst.name + ".tmp")
+    tmp.unlink(missing_ok=True)
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+
 # Daily Analytics Report Generator
 def generate_daily_analytics_report(
     output_dir: str = "analytics_reports",
@@ -944,7 +1024,8 @@ def generate_daily_analytics_report(
     report_timestamp = datetime.now()
     
     # Create output directory if it doesn't exist
-    Path(output_dir).mkdir(exist_ok=True)
+    out = Path(output_dir)
+    out.mkdir(exist_ok=True)
     
     # Initialize comprehensive report structure (lean version for LLM processing)
     report = {
@@ -1247,15 +1328,14 @@ def generate_daily_analytics_report(
         
         # Save detailed JSON report
         report_filename = f"analytics_report_{report_timestamp.strftime('%Y%m%d_%H%M%S')}.json"
-        report_path = os.path.join(output_dir, report_filename)
+        report_path = out / report_filename
         
         with open(report_path, 'w') as f:
             json.dump(report, f, indent=2, default=str)
         
         # Save latest report (for easy chatbot access)
-        latest_path = os.path.join(output_dir, "latest_analytics.json")
-        with open(latest_path, 'w') as f:
-            json.dump(report, f, indent=2, default=str)
+        latest_path = out / "latest_analytics.json"
+        _publish(report_path, latest_path)
         
         # Create human-readable summary
         summary_lines = [
@@ -1310,15 +1390,14 @@ def generate_daily_analytics_report(
         
         # Save human-readable summary
         summary_filename = f"analytics_summary_{report_timestamp.strftime('%Y%m%d_%H%M%S')}.txt"
-        summary_path = os.path.join(output_dir, summary_filename)
+        summary_path = out / summary_filename
         
         with open(summary_path, 'w') as f:
             f.write('\n'.join(summary_lines))
         
         # Also save as latest summary
-        latest_summary_path = os.path.join(output_dir, "latest_summary.txt")
-        with open(latest_summary_path, 'w') as f:
-            f.write('\n'.join(summary_lines))
+        latest_summary_path = out / "latest_summary.txt"
+        _publish(summary_path, latest_summary_path)
         
         print(f"✅ Analytics Report Generated Successfully!")
         print(f"   📋 Summary: {summary_path}")
@@ -1335,7 +1414,7 @@ def generate_daily_analytics_report(
             "status": "failed"
         }
         
-        error_path = os.path.join(output_dir, "error_log.json")
+        error_path = out / "error_log.json"
         with open(error_path, 'w') as f:
             json.dump(error_report, f, indent=2)
         
@@ -1363,7 +1442,8 @@ def generate_combined_analytics_report(
     report_timestamp = datetime.now()
     
     # Create output directory if it doesn't exist
-    Path(output_dir).mkdir(exist_ok=True)
+    out = Path(output_dir)
+    out.mkdir(exist_ok=True)
     
     print(f"🚀 Generating Combined ParentPass Analytics Report")
     print(f"📅 Report Date: {report_timestamp.strftime('%Y-%m-%d %H:%M:%S')}")
@@ -1409,15 +1489,14 @@ def generate_combined_analytics_report(
         
         # Save combined report
         combined_filename = f"combined_analytics_{report_timestamp.strftime('%Y%m%d_%H%M%S')}.json"
-        combined_path = os.path.join(output_dir, combined_filename)
+        combined_path = out / combined_filename
         
         with open(combined_path, 'w') as f:
             json.dump(combined_report, f, indent=2, default=str)
         
         # Save as latest combined report
-        latest_combined_path = os.path.join(output_dir, "latest_combined_analytics.json")
-        with open(latest_combined_path, 'w') as f:
-            json.dump(combined_report, f, indent=2, default=str)
+        latest_combined_path = out / "latest_combined_analytics.json"
+        _publish(combined_path, latest_combined_path)
         
         print(f"✅ Combined Analytics Report Generated Successfully!")
         print(f"   📊 Combined Report: {combined_path}")
@@ -1433,7 +1512,7 @@ def generate_combined_analytics_report(
             "report_type": "combined_analytics"
         }
         
-        error_path = os.path.join(output_dir, "combined_error_log.json")
+        error_path = out / "combined_error_log.json"
         with open(error_path, 'w') as f:
             json.dump(error_report, f, indent=2)
         
@@ -1474,9 +1553,9 @@ def get_latest_analytics(analytics_dir: str = "analytics_reports") -> Optional[D
     latest_path = os.path.join(analytics_dir, "latest_analytics.json")
     
     try:
-        if os.path.exists(latest_path):
-            with open(latest_path, 'r') as f:
-                return json.load(f)
+        with open(latest_path, 'rb') as f:
+            return orjson.loads(f.read())
+    except FileNotFoundError:
         return None
     except Exception as e:
         print(f"Error loading latest analytics: {e}")
@@ -1496,9 +1575,9 @@ def get_latest_combined_analytics(analytics_dir: str = "analytics_reports") -> O
     latest_path = os.path.join(analytics_dir, "latest_combined_analytics.json")
     
     try:
-        if os.path.exists(latest_path):
-            with open(latest_path, 'r') as f:
-                return json.load(f)
+        with open(latest_path, 'rb') as f:
+            return orjson.loads(f.read())
+    except FileNotFoundError:
         return None
     except Exception as e:
         print(f"Error loading latest combined analytics: {e}")
@@ -1518,9 +1597,9 @@ def get_latest_azure_analytics(analytics_dir: str = "analytics_reports") -> Opti
     latest_path = os.path.join(analytics_dir, "latest_azure_analytics.json")
     
     try:
-        if os.path.exists(latest_path):
-            with open(latest_path, 'r') as f:
-                return json.load(f)
+        with open(latest_path, 'rb') as f:
+            return orjson.loads(f.read())
+    except FileNotFoundError:
         return None
     except Exception as e:
         print(f"Error loading latest Azure analytics: {e}")
@@ -1544,24 +1623,19 @@ if __name__ == "__main__":
                 report = azure.generate_comprehensive_azure_report()
                 
                 # Save Azure-only report
-                from pathlib import Path
-                import json
-                from datetime import datetime
-                
-                output_dir = "analytics_reports"
-                Path(output_dir).mkdir(exist_ok=True)
+                out = Path("analytics_reports")
+                out.mkdir(exist_ok=True)
                 
                 report_timestamp = datetime.now()
                 azure_filename = f"azure_analytics_{report_timestamp.strftime('%Y%m%d_%H%M%S')}.json"
-                azure_path = os.path.join(output_dir, azure_filename)
+                azure_path = out / azure_filename
                 
                 with open(azure_path, 'w') as f:
                     json.dump(report, f, indent=2, default=str)
                 
                 # Save as latest Azure report
-                latest_azure_path = os.path.join(output_dir, "latest_azure_analytics.json")
-                with open(latest_azure_path, 'w') as f:
-                    json.dump(report, f, indent=2, default=str)
+                latest_azure_path = out / "latest_azure_analytics.json"
+                _publish(azure_path, latest_azure_path)
                 
                 print(f"✅ Azure Analytics Report Generated Successfully!")
                 print(f"   📊 Azure Report: {azure_path}")
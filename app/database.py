@@ -2,21 +2,82 @@
 This module provides the AzureSQLReadOnlyConnection class which handles database connections
 to Azure SQL Database and enforces read-only query safety. It validates queries to prevent
 any write operations and provides a secure interface for executing read-only database operations.
+Connections are shared through the module-level connection_pool.
 """
 
 import os
-import pyodbc
+import queue
+import anyio
+import threading
 import re
-import json
-from typing import List, Dict, Any, Optional
+import orjson
+from typing import TYPE_CHECKING, Iterator, List, Dict, Any, Optional
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
 from decimal import Decimal
 from dotenv import load_dotenv
 
+load_dotenv()
+
+if TYPE_CHECKING:
+    import pyodbc
+
+# The native ODBC driver is loaded on first connect, not at import time
+_pyodbc = None
+
+
+def _load_pyodbc():
+    """Import pyodbc on first use and enable driver-manager pooling"""
+    global _pyodbc
+    if _pyodbc is None:
+        import pyodbc
+
+        # Pooling must be enabled before any connection is opened
+        pyodbc.pooling = True
+        _pyodbc = pyodbc
+    return _pyodbc
+
+
+# Number of rows pulled from the driver per round trip
+FETCH_BATCH_SIZE = 1000
+
+# Maximum number of prepared statement cursors kept open per connection
+PREPARED_CACHE_SIZE = 64
+
+# Query validation patterns, compiled once at import time
+_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_WHITESPACE = re.compile(r"\s+")
+
+# Single-pass classifier: any "write" match rejects the query, and the query
+# must start with an "allow" form. The allow branch is a zero-width lookahead
+# so it never consumes text that a later write keyword could be hiding in.
+_CLASSIFIER = re.compile(
+    r"(?P<write>\b(?:INSERT|UPDATE|DELETE|DROP|CREATE|ALTER|TRUNCATE|MERGE"
+    r"|REPLACE|EXEC|EXECUTE|CALL|SP_\w+|BULK\s+INSERT)\b|\bINTO\b.*\bVALUES\b)"
+    r"|(?P<allow>^(?=\s*(?:SELECT|SHOW|DESCRIBE|EXPLAIN)\b"
+    r"|\s*;?\s*WITH\b.*\bSELECT\b"  # CTE with SELECT (with optional semicolon)
+    r"|\s*DECLARE\b.*\bSELECT\b))",  # Variable declarations followed by SELECT
+    re.DOTALL,
+)
+
+
+def is_read_only_query(query: str) -> bool:
+    """Check if the query is strictly read-only"""
+    clean_query = _COMMENTS.sub("", query)  # Remove line and block comments
+    clean_query = _WHITESPACE.sub(" ", clean_query.strip().upper())
+
+    allowed = False
+    for match in _CLASSIFIER.finditer(clean_query):
+        if match.lastgroup == "write":
+            return False
+        allowed = True
+
+    return allowed
+
 
 class AzureSQLReadOnlyConnection:
     def __init__(self):
-        load_dotenv()
         self.server = os.getenv("DB_SERVER")
         self.database = os.getenv("DB_DATABASE")
         self.username = os.getenv("DB_USER")
@@ -35,12 +96,16 @@ class AzureSQLReadOnlyConnection:
             "TrustServerCertificate=no;"
             "Connection Timeout=30;"
         )
-        self.connection: Optional[pyodbc.Connection] = None
+        self.connection: Optional["pyodbc.Connection"] = None
+        # One cursor per distinct SQL text so the driver can reuse the prepared plan
+        self._prepared: OrderedDict[str, "pyodbc.Cursor"] = OrderedDict()
 
     def connect(self) -> bool:
         """Establish connection to Azure SQL Database"""
         try:
-            self.connection = pyodbc.connect(self.connection_string)
+            self.connection = _load_pyodbc().connect(self.connection_string)
+            # Read-only workload: skip implicit transactions on every statement
+            self.connection.autocommit = True
             return True
         except Exception as e:
             print(f"Error connecting to database: {e}")
@@ -48,54 +113,25 @@ class AzureSQLReadOnlyConnection:
 
     def disconnect(self):
         """Close database connection"""
+        for cursor in self._prepared.values():
+            cursor.close()
+        self._prepared.clear()
         if self.connection:
             self.connection.close()
             self.connection = None
 
-    def _is_read_only_query(self, query: str) -> bool:
-        """Check if the query is strictly read-only"""
-        clean_query = re.sub(r"--.*", "", query)  # Remove line comments
-        clean_query = re.sub(
-            r"/\*.*?\*/", "", clean_query, flags=re.DOTALL
-        )  # Remove block comments
-        clean_query = re.sub(r"\s+", " ", clean_query.strip().upper())
-
-        write_patterns = [
-            r"\bINSERT\b",
-            r"\bUPDATE\b",
-            r"\bDELETE\b",
-            r"\bDROP\b",
-            r"\bCREATE\b",
-            r"\bALTER\b",
-            r"\bTRUNCATE\b",
-            r"\bMERGE\b",
-            r"\bREPLACE\b",
-            r"\bEXEC\b",
-            r"\bEXECUTE\b",
-            r"\bCALL\b",
-            r"\bSP_\w+\b",
-            r"\bBULK\s+INSERT\b",
-            r"\bINTO\b.*\bVALUES\b",
-        ]
-
-        for pattern in write_patterns:
-            if re.search(pattern, clean_query):
-                return False
-
-        allowed_patterns = [
-            r"^\s*SELECT\b",
-            r"^\s*;?\s*WITH\b.*\bSELECT\b",  # CTE with SELECT (with optional semicolon)
-            r"^\s*DECLARE\b.*\bSELECT\b",  # Variable declarations followed by SELECT
-            r"^\s*SHOW\b",
-            r"^\s*DESCRIBE\b",
-            r"^\s*EXPLAIN\b",
-        ]
-
-        for pattern in allowed_patterns:
-            if re.search(pattern, clean_query, flags=re.DOTALL):
-                return True
-
-        return False
+    def _get_cursor(self, query: str) -> "pyodbc.Cursor":
+        """Return the cached cursor for this SQL text, evicting the least recently used"""
+        assert self.connection is not None, "Connection should be established"
+        cursor = self._prepared.pop(query, None)
+        if cursor is None:
+            if len(self._prepared) >= PREPARED_CACHE_SIZE:
+                _, evicted = self._prepared.popitem(last=False)
+                evicted.close()
+            cursor = self.connection.cursor()
+            cursor.arraysize = FETCH_BATCH_SIZE
+        self._prepared[query] = cursor
+        return cursor
 
     def _serialize_for_json(self, obj):
         """Convert database values to JSON-serializable format"""
@@ -108,11 +144,11 @@ class AzureSQLReadOnlyConnection:
         else:
             return str(obj)
 
-    def execute_query(
+    def _iter_query(
         self, query: str, params: Optional[tuple] = None
-    ) -> List[Dict[str, Any]]:
-        """Execute a read-only SELECT query and return results as list of dictionaries"""
-        if not self._is_read_only_query(query):
+    ) -> Iterator[Dict[str, Any]]:
+        """Execute a read-only SELECT query and yield rows as dictionaries in batches"""
+        if not is_read_only_query(query):
             raise ValueError(
                 "Only read-only SELECT queries are allowed. Write operations are forbidden."
             )
@@ -121,9 +157,8 @@ class AzureSQLReadOnlyConnection:
             if not self.connect():
                 raise Exception("Failed to connect to database")
 
-        assert self.connection is not None, "Connection should be established"
+        cursor = self._get_cursor(query)
         try:
-            cursor = self.connection.cursor()
             if params:
                 cursor.execute(query, params)
             else:
@@ -131,35 +166,49 @@ class AzureSQLReadOnlyConnection:
 
             columns = [column[0] for column in cursor.description]
 
-            rows = cursor.fetchall()
-            result = []
-            for row in rows:
-                result.append(dict(zip(columns, row)))
-
-            cursor.close()
-            return result
+            while True:
+                rows = cursor.fetchmany(FETCH_BATCH_SIZE)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(zip(columns, row))
 
         except Exception as e:
             print(f"Error executing query: {e}")
+            # A failed cursor is left in an unknown state, so it must not be reused
+            if self._prepared.get(query) is cursor:
+                del self._prepared[query]
+            cursor.close()
             raise
 
-    def execute_query_for_llm(
+    def execute_query(
         self, query: str, params: Optional[tuple] = None
-    ) -> tuple[List[Dict[str, Any]], List[str]]:
-        """Execute query and return both serialized results for logging and JSON strings for LLM processing"""
-        db_results = self.execute_query(query, params)
+    ) -> List[Dict[str, Any]]:
+        """Execute a read-only SELECT query and return results as list of dictionaries"""
+        return list(self._iter_query(query, params))
 
-        safe_results = []
-        llm_results = []
+    def execute_query_for_llm(
+        self, query: str, params: Optional[tuple] = None
+    ) -> List[str]:
+        """Execute query and return each row as a JSON string for LLM processing"""
+        return [
+            orjson.dumps(row, default=self._serialize_for_json).decode()
+            for row in self._iter_query(query, params)
+        ]
 
-        for row in db_results:
-            serializable_row = {
-                key: self._serialize_for_json(value) for key, value in row.items()
-            }
-            safe_results.append(serializable_row)
-            llm_results.append(json.dumps(serializable_row, ensure_ascii=False))
+    async def aexecute_query(
+        self, query: str, params: Optional[tuple] = None
+    ) -> List[Dict[str, Any]]:
+        """Async variant of execute_query that runs in a worker thread"""
+        return await anyio.to_thread.run_sync(self.execute_query, query, params)
 
-        return safe_results, llm_results
+    async def aexecute_query_for_llm(
+        self, query: str, params: Optional[tuple] = None
+    ) -> List[str]:
+        """Async variant of execute_query_for_llm that runs in a worker thread"""
+        return await anyio.to_thread.run_sync(
+            self.execute_query_for_llm, query, params
+        )
 
     def __enter__(self):
         """Context manager entry"""
@@ -171,4 +220,67 @@ class AzureSQLReadOnlyConnection:
         self.disconnect()
 
 
-db = AzureSQLReadOnlyConnection()
+class ConnectionPool:
+    """Thread-safe pool of read-only connections, opened lazily up to pool_size"""
+
+    def __init__(self, pool_size: Optional[int] = None):
+        self.pool_size = pool_size or int(os.getenv("DB_POOL_MAX", "10"))
+        self._idle: queue.Queue[AzureSQLReadOnlyConnection] = queue.Queue(
+            maxsize=self.pool_size
+        )
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _get_connection(self) -> AzureSQLReadOnlyConnection:
+        """Take an idle connection, creating one if the pool is not yet full"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.pool_size:
+                connection = AzureSQLReadOnlyConnection()
+                self._created += 1
+                return connection
+
+        # Pool is exhausted: wait for another caller to release a connection
+        return self._idle.get()
+
+    @contextmanager
+    def acquire(self) -> Iterator[AzureSQLReadOnlyConnection]:
+        """Borrow a connection for the duration of a with-block"""
+        connection = self._get_connection()
+        try:
+            yield connection
+        finally:
+            self._idle.put(connection)
+
+    def execute_query(
+        self, query: str, params: Optional[tuple] = None
+    ) -> List[Dict[str, Any]]:
+        """Run a read-only query on a pooled connection"""
+        with self.acquire() as connection:
+            return connection.execute_query(query, params)
+
+    async def aexecute_query(
+        self, query: str, params: Optional[tuple] = None
+    ) -> List[Dict[str, Any]]:
+        """Run a read-only query on a pooled connection without blocking the event loop"""
+        # Acquire inside the worker thread too, so waiting on an exhausted pool
+        # never stalls the event loop
+        return await anyio.to_thread.run_sync(self.execute_query, query, params)
+
+    def close_all(self):
+        """Close every idle connection held by the pool"""
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            connection.disconnect()
+            with self._lock:
+                self._created -= 1
+
+
+connection_pool = ConnectionPool()
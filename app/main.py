@@ -1,17 +1,47 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 import logging
+import queue
+from contextlib import asynccontextmanager
+from logging.handlers import QueueHandler, QueueListener
+from typing import AsyncIterator
 from dotenv import load_dotenv
 
+# Load .env before the routers import, so module-level settings such as the
+# session store's REDIS_URL see it
+load_dotenv()
+
 # Import routers
-from .routers import health, sessions, queries
+from .routers import health, sessions, queries  # noqa: E402
 
-load_dotenv()
 logging.basicConfig(level=logging.WARNING)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Route root logging through a background listener while the app is serving."""
+    # Records are queued by the calling thread and written by the listener, so
+    # logging from a request handler never blocks the event loop on stderr
+    root = logging.getLogger()
+    handlers = root.handlers[:]
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    root.handlers = [QueueHandler(log_queue)]
+    listener.start()
+    try:
+        yield
+    finally:
+        # Restore direct handlers first so shutdown records are still written
+        root.handlers = handlers
+        listener.stop()
+
+
 app = FastAPI(
     title="ParentPass Chatbot API",
     description="Administrative chatbot API for ParentPass analytics and platform data",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
     tags_metadata=[
         {
             "name": "health",
@@ -2,7 +2,7 @@
 Request models for ParentPass Chatbot API endpoints.
 """
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from baml_client.types import State
 
 
@@ -14,12 +14,13 @@ class QueryRequest(BaseModel):
         description="The user's message to send to the chatbot"
     )
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "message": "Show me user engagement metrics for this week"
             }
         }
+    )
 
 
 class SessionResponse(BaseModel):
@@ -34,8 +35,8 @@ class SessionResponse(BaseModel):
         description="Current state of the session including conversation history"
     )
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "session_id": "550e8400-e29b-41d4-a716-446655440000",
                 "state": {
@@ -47,4 +48,5 @@ class SessionResponse(BaseModel):
                     ]
                 }
             }
-        } 
\ No newline at end of file
+        }
+    )
\ No newline at end of file
@@ -4,7 +4,7 @@ Response models for ParentPass Chatbot API endpoints.
 
 from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class HealthResponse(BaseModel):
@@ -23,14 +23,15 @@ class HealthResponse(BaseModel):
         description="API version"
     )
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "status": "ok",
                 "timestamp": "2024-01-15T10:30:00Z",
                 "version": "1.0.0"
             }
         }
+    )
 
 
 class QueryResponse(BaseModel):
@@ -53,8 +54,8 @@ class QueryResponse(BaseModel):
         description="Time taken to process the query in milliseconds"
     )
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "response": "Based on the analytics data, user engagement has increased by 15% this month. The most popular sections are Events and Recommendations.",
                 "session_id": "550e8400-e29b-41d4-a716-446655440000",
@@ -62,6 +63,7 @@ class QueryResponse(BaseModel):
                 "processing_time_ms": 1250
             }
         }
+    )
 
 
 class DeleteSessionResponse(BaseModel):
@@ -80,14 +82,15 @@ class DeleteSessionResponse(BaseModel):
         description="Timestamp when the session was deleted"
     )
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "deleted": True,
                 "session_id": "550e8400-e29b-41d4-a716-446655440000",
                 "timestamp": "2024-01-15T10:30:00Z"
             }
         }
+    )
 
 
 class ErrorResponse(BaseModel):
@@ -110,12 +113,13 @@ class ErrorResponse(BaseModel):
         description="Machine-readable error code"
     )
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "error": "Invalid API key",
                 "detail": "The provided API key is not valid or has expired",
                 "timestamp": "2024-01-15T10:30:00Z",
                 "error_code": "AUTH_001"
             }
-        } 
\ No newline at end of file
+        }
+    )
\ No newline at end of file
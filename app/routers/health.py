@@ -3,6 +3,7 @@ Health check router for the ParentPass Chatbot API.
 """
 
 from datetime import datetime
+from typing import Dict
 from fastapi import APIRouter, Depends
 from ..models.responses import HealthResponse, ErrorResponse
 from ..auth import verify_api_key
@@ -16,9 +17,13 @@ router = APIRouter(
 )
 
 
+# Static part of the health payload, built once; only the timestamp changes
+_HEALTH_PAYLOAD = {"status": "ok", "version": "1.0.0"}
+
+
 @router.get(
     "/health",
-    response_model=HealthResponse,
+    response_model=None,
     summary="Health Check",
     description="Check the health status of the ParentPass Chatbot API",
     responses={
@@ -33,15 +38,18 @@ router = APIRouter(
         },
     },
 )
-def health_check() -> HealthResponse:
+def health_check() -> Dict[str, str]:
     """
     Perform a health check on the API.
     
     This endpoint verifies that the API is running and accessible.
     No authentication required for monitoring purposes.
     
+    The payload matches HealthResponse but is returned as a plain dict to
+    skip response model validation on this frequently polled endpoint.
+
     Returns:
-        HealthResponse: Contains status information and timestamp
+        dict: Contains status information and timestamp
         
     Raises:
         HTTPException: 500 if there are internal server issues
@@ -60,8 +68,4 @@ def health_check() -> HealthResponse:
         }
         ```
     """
-    return HealthResponse(
-        status="ok",
-        timestamp=datetime.now(),
-        version="1.0.0"
-    ) 
\ No newline at end of file
+    return {**_HEALTH_PAYLOAD, "timestamp": datetime.now().isoformat()}
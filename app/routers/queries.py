@@ -2,16 +2,31 @@
 Query processing router for the ParentPass Chatbot API.
 """
 
+import asyncio
+import logging
 import time
+import orjson
 from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
 from fastapi import APIRouter, Request, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from ..models.responses import QueryResponse, ErrorResponse
 from ..models.requests import QueryRequest
 from ..auth import verify_api_key, get_session_from_header
 from ..session_store import session_store
 from ..analytics_loader import get_analytics_data_for_category
 from baml_client import b
-from baml_client.types import Message, AnalyticsQuestion
+from baml_client.types import Message, AnalyticsQuestion, State
+
+logger = logging.getLogger(__name__)
+
+# Upper bound for a single LLM call; on timeout the call is cancelled and the
+# request falls through to the generic error response
+LLM_TIMEOUT_SECONDS = 30
+
+# Conversation history kept per session; older turns are dropped so prompt
+# size and session payloads stay bounded
+MAX_RECENT_MESSAGES = 40
 
 router = APIRouter(
     prefix="/api",
@@ -24,6 +39,30 @@ router = APIRouter(
 )
 
 
+def _append_message(state: State, message: Message) -> None:
+    """Append a message to the conversation, dropping the oldest beyond the cap."""
+    state.recent_messages.append(message)
+    del state.recent_messages[:-MAX_RECENT_MESSAGES]
+
+
+def _sse(data: Dict[str, Any], event: Optional[str] = None) -> bytes:
+    """Encode a single Server-Sent Event."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: ".encode() + orjson.dumps(data) + b"\n\n"
+
+
+async def _relay_content(stream, emitted: List[str]) -> AsyncIterator[bytes]:
+    """Yield delta events as the content of a BAML stream's partial results grows."""
+    sent = ""
+    async for partial in stream:
+        # Only Message partials carry content; AnalyticsQuestion partials are skipped
+        content = getattr(partial, "content", None)
+        if content and len(content) > len(sent) and content.startswith(sent):
+            emitted.append(content[len(sent) :])
+            yield _sse({"delta": emitted[-1]})
+            sent = content
+
+
 @router.post(
     "/query",
     response_model=QueryResponse,
@@ -108,55 +147,74 @@ async def process_query(
         The chatbot maintains conversation context within each session.
         Analytics data is automatically loaded based on the query type.
     """
-    start_time = time.time()
-    
+    start_time = time.perf_counter()
+    session_id = "unknown"
+
     try:
         session_id = get_session_from_header(request)
-        state = session_store.get_state(session_id)
 
-        # Add user message to conversation history
-        state.recent_messages.append(
-            Message(
-                role="user",
-                content=query_request.message,
+        # Hold the session for the whole read-modify-write so concurrent
+        # requests on one session cannot interleave turns
+        async with session_store.with_session(session_id):
+            state = await session_store.get_state(session_id)
+
+            # Add user message to conversation history
+            _append_message(
+                state,
+                Message(
+                    role="user",
+                    content=query_request.message,
+                ),
             )
-        )
 
-        # Step 1: Process the query with the Chat function
-        response = await b.Chat(state)
-
-        # Step 2: Handle different response types
-        if isinstance(response, Message):
-            # Direct response from the chatbot
-            response_message = response
-        elif isinstance(response, AnalyticsQuestion):
-            # Query requires analytics data
-            analytics_data = get_analytics_data_for_category(response.category)
-
-            if analytics_data:
-                # Process analytics data and generate response
-                response_message = await b.AnswerAnalyticsQuestion(
-                    state, analytics_data
+            try:
+                # Step 1: Process the query with the Chat function
+                response = await asyncio.wait_for(
+                    b.Chat(state), timeout=LLM_TIMEOUT_SECONDS
                 )
-            else:
-                # Analytics data not available
+
+                # Step 2: Handle different response types
+                if isinstance(response, Message):
+                    # Direct response from the chatbot
+                    response_message = response
+                elif isinstance(response, AnalyticsQuestion):
+                    # Query requires analytics data
+                    analytics_data = get_analytics_data_for_category(response.category)
+
+                    if analytics_data:
+                        # Process analytics data and generate response
+                        response_message = await asyncio.wait_for(
+                            b.AnswerAnalyticsQuestion(state, analytics_data),
+                            timeout=LLM_TIMEOUT_SECONDS,
+                        )
+                    else:
+                        # Analytics data not available
+                        response_message = Message(
+                            role="assistant",
+                            content="I don't have access to the analytics data needed to answer your question right now. "
+                            "Please try again later or contact support if this issue persists.",
+                        )
+                else:
+                    # Unexpected response type
+                    response_message = Message(
+                        role="assistant",
+                        content="I'm having trouble processing your request right now. Please try rephrasing your question or try again later.",
+                    )
+            except Exception:
+                # Record the failed turn while still holding the lock, so no
+                # turn committed by another request can be overwritten
+                logger.exception("Error processing query")
                 response_message = Message(
                     role="assistant",
-                    content="I don't have access to the analytics data needed to answer your question right now. "
-                    "Please try again later or contact support if this issue persists.",
+                    content="I'm having trouble processing your request right now. Please try again.",
                 )
-        else:
-            # Unexpected response type
-            response_message = Message(
-                role="assistant",
-                content="I'm having trouble processing your request right now. Please try rephrasing your question or try again later.",
-            )
 
-        # Add assistant response to conversation history
-        state.recent_messages.append(response_message)
+            # Add assistant response to conversation history
+            _append_message(state, response_message)
+            await session_store.set_state(session_id, state)
 
         # Calculate processing time
-        processing_time_ms = int((time.time() - start_time) * 1000)
+        processing_time_ms = int((time.perf_counter() - start_time) * 1000)
 
         return QueryResponse(
             response=response_message.content,
@@ -168,35 +226,172 @@ async def process_query(
     except HTTPException:
         # Re-raise HTTP exceptions (like missing session header)
         raise
-    except Exception as e:
-        # Handle unexpected errors
-        processing_time_ms = int((time.time() - start_time) * 1000)
-        
+    except Exception:
+        # The session store itself failed, so there is no history to update
+        processing_time_ms = int((time.perf_counter() - start_time) * 1000)
+
         # Log the error for debugging
-        print(f"Error processing query: {e}")
-        
-        # Try to get session_id for response, fallback to "unknown"
-        try:
-            session_id = get_session_from_header(request)
-        except:
-            session_id = "unknown"
-            
-        # Add error message to conversation history if possible
-        try:
-            if session_id != "unknown":
-                state = session_store.get_state(session_id)
-                error_message = Message(
-                    role="assistant",
-                    content="I'm having trouble processing your request right now. Please try again.",
-                )
-                state.recent_messages.append(error_message)
-        except:
-            # If we can't update the session, just continue
-            pass
+        logger.exception("Error processing query")
 
         return QueryResponse(
             response="I'm having trouble processing your request right now. Please try again.",
             session_id=session_id,
             timestamp=datetime.now(),
             processing_time_ms=processing_time_ms
-        ) 
\ No newline at end of file
+        )
+
+
+@router.post(
+    "/query/stream",
+    summary="Process Query (Streaming)",
+    description="Send a message to the chatbot and stream the response as Server-Sent Events",
+    responses={
+        200: {
+            "description": "Stream of `delta` events followed by a final `done` event",
+            "content": {"text/event-stream": {}},
+        },
+        400: {
+            "description": "Missing X-Session-ID header or invalid request",
+            "model": ErrorResponse,
+        },
+        403: {
+            "description": "Invalid or missing API key",
+            "model": ErrorResponse,
+        },
+    },
+)
+async def stream_query(
+    request: Request,
+    query_request: QueryRequest,
+    api_key: str = Depends(verify_api_key),
+) -> StreamingResponse:
+    """
+    Process a user query and stream the chatbot's response as it is generated.
+
+    Each chunk of text is sent as an unnamed event with a `{"delta": "..."}`
+    payload. The stream ends with a `done` event carrying the same body as
+    `/api/query`, or an `error` event if processing failed.
+    """
+    start_time = time.perf_counter()
+    session_id = get_session_from_header(request)
+
+    async def produce(out: "asyncio.Queue[Optional[bytes]]") -> None:
+        """Run one turn under the session lock, queueing events as they are ready.
+
+        The turn never waits on the client, so a slow or vanished reader cannot
+        keep the session locked.
+        """
+        emitted: List[str] = []
+        state = None
+        user_message = Message(
+            role="user",
+            content=query_request.message,
+        )
+        try:
+            async with session_store.with_session(session_id):
+                try:
+                    state = await session_store.get_state(session_id)
+
+                    # Add user message to conversation history
+                    _append_message(state, user_message)
+
+                    # One deadline covers the whole LLM exchange, partials included
+                    async with asyncio.timeout(LLM_TIMEOUT_SECONDS):
+                        stream = b.stream.Chat(state)
+                        async for event in _relay_content(stream, emitted):
+                            out.put_nowait(event)
+                        response = await stream.get_final_response()
+
+                        if isinstance(response, AnalyticsQuestion):
+                            analytics_data = get_analytics_data_for_category(
+                                response.category
+                            )
+                            if analytics_data:
+                                emitted.clear()
+                                stream = b.stream.AnswerAnalyticsQuestion(
+                                    state, analytics_data
+                                )
+                                async for event in _relay_content(stream, emitted):
+                                    out.put_nowait(event)
+                                response = await stream.get_final_response()
+                            else:
+                                response = Message(
+                                    role="assistant",
+                                    content="I don't have access to the analytics data needed to answer your question right now. "
+                                    "Please try again later or contact support if this issue persists.",
+                                )
+                        elif not isinstance(response, Message):
+                            response = Message(
+                                role="assistant",
+                                content="I'm having trouble processing your request right now. Please try rephrasing your question or try again later.",
+                            )
+
+                    # Flush whatever the partial results did not already deliver
+                    sent = "".join(emitted)
+                    content = response.content
+                    if content.startswith(sent) and len(content) > len(sent):
+                        out.put_nowait(_sse({"delta": content[len(sent) :]}))
+
+                    _append_message(state, response)
+                    await session_store.set_state(session_id, state)
+
+                    out.put_nowait(
+                        _sse(
+                            QueryResponse(
+                                response=response.content,
+                                session_id=session_id,
+                                timestamp=datetime.now(),
+                                processing_time_ms=int(
+                                    (time.perf_counter() - start_time) * 1000
+                                ),
+                            ).model_dump(mode="json"),
+                            event="done",
+                        )
+                    )
+
+                except Exception:
+                    logger.exception("Error streaming query")
+                    error_message = Message(
+                        role="assistant",
+                        content="I'm having trouble processing your request right now. Please try again.",
+                    )
+                    if state is not None:
+                        _append_message(state, error_message)
+                        await session_store.set_state(session_id, state)
+                    out.put_nowait(
+                        _sse(
+                            {"response": error_message.content, "session_id": session_id},
+                            event="error",
+                        )
+                    )
+
+                except asyncio.CancelledError:
+                    # The client disconnected mid-turn. Record the same error turn
+                    # as a failure, so both stores keep the user message paired
+                    # with a reply, then let the cancellation finish
+                    if state is not None:
+                        if state.recent_messages[-1] is user_message:
+                            _append_message(
+                                state,
+                                Message(
+                                    role="assistant",
+                                    content="I'm having trouble processing your request right now. Please try again.",
+                                ),
+                            )
+                        await session_store.set_state(session_id, state)
+                    raise
+        finally:
+            # End-of-stream marker
+            out.put_nowait(None)
+
+    async def events() -> AsyncIterator[bytes]:
+        out: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue()
+        turn = asyncio.create_task(produce(out))
+        try:
+            while (event := await out.get()) is not None:
+                yield event
+        finally:
+            # Client went away mid-stream: stop the turn and release the lock
+            turn.cancel()
+
+    return StreamingResponse(events(), media_type="text/event-stream")
@@ -41,7 +41,7 @@ router = APIRouter(
     },
     status_code=201,
 )
-def create_session(api_key: str = Depends(verify_api_key)) -> SessionResponse:
+async def create_session(api_key: str = Depends(verify_api_key)) -> SessionResponse:
     """
     Create a new chatbot session.
     
@@ -82,7 +82,7 @@ def create_session(api_key: str = Depends(verify_api_key)) -> SessionResponse:
         ```
     """
     session_id = str(uuid.uuid4())
-    state = session_store.get_state(session_id)
+    state = await session_store.get_state(session_id)
     return SessionResponse(session_id=session_id, state=state)
 
 
@@ -110,7 +110,7 @@ def create_session(api_key: str = Depends(verify_api_key)) -> SessionResponse:
         },
     },
 )
-def get_session(
+async def get_session(
     session_id: str, api_key: str = Depends(verify_api_key)
 ) -> SessionResponse:
     """
@@ -157,7 +157,7 @@ def get_session(
         ```
     """
     try:
-        state = session_store.get_state(session_id)
+        state = await session_store.get_state(session_id)
         return SessionResponse(session_id=session_id, state=state)
     except KeyError:
         raise HTTPException(
@@ -186,7 +186,7 @@ def get_session(
         },
     },
 )
-def delete_session(
+async def delete_session(
     session_id: str, api_key: str = Depends(verify_api_key)
 ) -> DeleteSessionResponse:
     """
@@ -227,7 +227,7 @@ def delete_session(
         }
         ```
     """
-    session_store.delete_session(session_id)
+    await session_store.delete_session(session_id)
     return DeleteSessionResponse(
         deleted=True,
         session_id=session_id,
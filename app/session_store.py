@@ -1,7 +1,30 @@
-from typing import Dict
-from datetime import datetime, timedelta
+import asyncio
+import heapq
+import os
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Tuple
 from baml_client.types import State, Message
-from .session_state import create_state
+
+# Sessions expire this long after creation
+SESSION_TTL_SECONDS = 4 * 60 * 60
+
+# Expired sessions are swept at most this often
+CLEANUP_INTERVAL_SECONDS = 1.0
+
+
+# Messages are never mutated once in a conversation, so every new session can
+# share this instance
+_WELCOME_MESSAGE = Message(
+    role="assistant",
+    content="Hello! I'm the ParentPass administrative assistant. How can I help you analyze the platform today?",
+)
+
+
+def initial_state() -> State:
+    """Create initial state with a welcome message for administrators."""
+    return State(recent_messages=[_WELCOME_MESSAGE])
 
 
 class SessionData:
@@ -9,58 +32,134 @@ class SessionData:
 
     def __init__(self, state: State):
         self.state = state
-        self.created_at = datetime.now()
+        self.created_at = time.monotonic()
+
+
+class SessionLocks:
+    """Per-session asyncio locks for serializing updates to one conversation.
+
+    Locks live in a weak dictionary, so an entry disappears once no request
+    is holding or waiting on it.
+    """
+
+    def __init__(self):
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = (
+            weakref.WeakValueDictionary()
+        )
 
+    @asynccontextmanager
+    async def with_session(self, session_id: str) -> AsyncIterator[None]:
+        """Hold the session's lock for the duration of an async with-block."""
+        lock = self._locks.get(session_id)
+        if lock is None:
+            lock = self._locks[session_id] = asyncio.Lock()
+        async with lock:
+            yield
 
-class SessionStore:
+
+class SessionStore(SessionLocks):
     def __init__(self):
+        super().__init__()
         self._sessions: Dict[str, SessionData] = {}
+        # Min-heap of (created_at, session_id); may hold stale entries for
+        # sessions that were deleted or recreated, which are skipped on pop
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._next_cleanup = 0.0
+
+    def _add_session(self, session_id: str, state: State) -> None:
+        """Store a new session and schedule its expiry."""
+        session_data = SessionData(state)
+        self._sessions[session_id] = session_data
+        heapq.heappush(self._expiry_heap, (session_data.created_at, session_id))
 
-    def get_state(self, session_id: str) -> State:
+    async def get_state(self, session_id: str) -> State:
         """Get the state for a session, creating a new one if it doesn't exist."""
         # Clean up expired sessions when accessing
         self._cleanup_expired_sessions()
         if session_id not in self._sessions:
-            self._sessions[session_id] = SessionData(initial_state())
+            self._add_session(session_id, initial_state())
         return self._sessions[session_id].state
 
-    def set_state(self, session_id: str, state: State) -> None:
+    async def set_state(self, session_id: str, state: State) -> None:
         """Update the state for a session."""
         if session_id in self._sessions:
             self._sessions[session_id].state = state
         else:
-            self._sessions[session_id] = SessionData(state)
+            self._add_session(session_id, state)
 
-    def delete_session(self, session_id: str) -> None:
+    async def delete_session(self, session_id: str) -> None:
         """Remove a session and its state."""
         if session_id in self._sessions:
             del self._sessions[session_id]
 
     def _cleanup_expired_sessions(self):
         """Remove sessions older than 4 hours."""
-        cutoff = datetime.now() - timedelta(hours=4)
-        expired = [
-            sid
-            for sid, session_data in self._sessions.items()
-            if session_data.created_at < cutoff
-        ]
-        for sid in expired:
-            del self._sessions[sid]
+        now = time.monotonic()
+        if now < self._next_cleanup:
+            return
+        self._next_cleanup = now + CLEANUP_INTERVAL_SECONDS
 
+        cutoff = now - SESSION_TTL_SECONDS
+        heap = self._expiry_heap
+        while heap and heap[0][0] < cutoff:
+            created_at, sid = heapq.heappop(heap)
+            session_data = self._sessions.get(sid)
+            if session_data is not None and session_data.created_at == created_at:
+                del self._sessions[sid]
 
-# Create a global session store instance
-session_store = SessionStore()
 
+class RedisSessionStore(SessionLocks):
+    """Session store backed by Redis so state is shared across uvicorn workers.
 
-def initial_state() -> State:
-    """Create initial state with a welcome message for administrators."""
-    state = create_state()
+    Keys expire SESSION_TTL_SECONDS after creation via Redis's own TTL, so no
+    cleanup sweep is needed. with_session only serializes requests within one
+    worker process.
+    """
+
+    KEY_PREFIX = "sess:"
+
+    def __init__(self, url: str):
+        # Imported lazily so the in-memory store works without redis installed
+        import redis.asyncio as redis
+
+        super().__init__()
+        self._redis = redis.Redis.from_url(url)
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.KEY_PREFIX}{session_id}"
+
+    async def get_state(self, session_id: str) -> State:
+        """Get the state for a session, creating a new one if it doesn't exist."""
+        key = self._key(session_id)
+        raw = await self._redis.get(key)
+        if raw is None:
+            state = initial_state()
+            # NX so a session another worker created in the meantime, possibly
+            # with turns already saved, is never overwritten
+            if await self._redis.set(
+                key, state.model_dump_json(), ex=SESSION_TTL_SECONDS, nx=True
+            ):
+                return state
+            raw = await self._redis.get(key)
+            if raw is None:
+                # Deleted again between the two calls
+                return state
+        return State.model_validate_json(raw)
+
+    async def set_state(self, session_id: str, state: State) -> None:
+        """Update the state for a session, keeping its original expiry."""
+        key = self._key(session_id)
+        payload = state.model_dump_json()
+        # KEEPTTL only applies to existing keys; fall back to a fresh TTL
+        if not await self._redis.set(key, payload, keepttl=True, xx=True):
+            await self._redis.set(key, payload, ex=SESSION_TTL_SECONDS)
+
+    async def delete_session(self, session_id: str) -> None:
+        """Remove a session and its state."""
+        await self._redis.delete(self._key(session_id))
 
-    # Add welcome message
-    welcome_message = Message(
-        role="assistant",
-        content="Hello! I'm the ParentPass administrative assistant. How can I help you analyze the platform today?",
-    )
-    state.recent_messages.append(welcome_message)
 
-    return state
+# Create a global session store instance; REDIS_URL switches to the shared
+# Redis store so the API can run with multiple workers
+_redis_url = os.getenv("REDIS_URL")
+session_store = RedisSessionStore(_redis_url) if _redis_url else SessionStore()
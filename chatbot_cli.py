@@ -17,11 +17,15 @@ if not API_KEY:
     print("Error: Please set PP_API_KEY environment variable")
     sys.exit(1)
 headers = {"Authorization": f"Bearer {API_KEY}", "Content-Type": "application/json"}
+# Shared session so every request reuses the same keep-alive connection
+http = requests.Session()
+http.headers.update(headers)
+EMPHASIS_PATTERN = re.compile(r"==(.*?)==")
 
 
 def create_session():
     """Create a new chat session and return session_id and welcome message"""
-    response = requests.post(f"{API_BASE_URL}/sessions", headers=headers)
+    response = http.post(f"{API_BASE_URL}/sessions")
     if response.status_code == 200:
         data = response.json()
         session_id = data["session_id"]
@@ -43,18 +47,16 @@ def format_response(text):
     """Format response text by converting ==emphasis== to bold text"""
 
     # Replace ==text== with bold ANSI codes
-    formatted = re.sub(r"==(.*?)==", r"\033[1m\1\033[0m", text)
+    formatted = EMPHASIS_PATTERN.sub(r"\033[1m\1\033[0m", text)
     return formatted
 
 
 def ask_question(session_id, message):
     """Send a message to the chatbot"""
-    session_headers = {**headers, "X-Session-ID": session_id}
+    session_headers = {"X-Session-ID": session_id}
     payload = {"message": message}
 
-    response = requests.post(
-        f"{API_BASE_URL}/query", headers=session_headers, json=payload
-    )
+    response = http.post(f"{API_BASE_URL}/query", headers=session_headers, json=payload)
     if response.status_code == 200:
         return format_response(response.json()["response"])
     else:
@@ -63,7 +65,7 @@ def ask_question(session_id, message):
 
 def delete_session(session_id):
     """Clean up the session"""
-    requests.delete(f"{API_BASE_URL}/sessions/{session_id}", headers=headers)
+    http.delete(f"{API_BASE_URL}/sessions/{session_id}")
 
 
 def main():
@@ -8,12 +8,20 @@ Usage:
     python generate_categorized_analytics.py
 """
 import asyncio
+import concurrent.futures
+import hashlib
 import sys
 import os
 import json
+import orjson
+import pickle
+import statistics
+import time
+from collections import Counter
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any, List, Tuple, Optional
+from decimal import Decimal
+from typing import Callable, Dict, Any, List, Tuple, Optional
 
 # Add the app directory to Python path before importing local modules
 app_dir = Path(__file__).parent / "app"
@@ -32,317 +40,76 @@ from app.bigquery import (  # noqa: E402
     section_visit,
 )
 from app.azure_analytics import AzureAnalytics  # noqa: E402
+from app.analytics_meta import AZURE_SOURCE, BIGQUERY_SOURCE  # noqa: E402
+# Import BAML client
 from baml_client import b  # noqa: E402
+from baml_client.types import AnalyticsQueryInput  # noqa: E402
 
+# Upper bound on concurrent LLM calls, to stay within provider rate limits
+MAX_CONCURRENT_SUMMARIES = int(os.getenv("PP_LLM_CONCURRENCY", "4"))
 
-def is_valid_data(data: Any) -> bool:
-    """Check if data is valid for analysis."""
-    if data is None:
-        return False
-    if isinstance(data, (list, dict)) and len(data) == 0:
-        return False
-    if isinstance(data, str) and data.strip() == "":
-        return False
-    return True
+# Upper bound on LLM calls started per minute
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("PP_LLM_RPM", "60"))
 
+# Worker threads for the blocking BigQuery/Azure query functions; bounded so a
+# full fan-out cannot exhaust the Azure connection pool
+MAX_QUERY_WORKERS = 8
+_EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+    max_workers=MAX_QUERY_WORKERS, thread_name_prefix="analytics-query"
+)
 
-def get_function_info(func) -> Dict[str, str]:
-    """Get information about a function for error reporting."""
-    function_map = {
-        # BigQuery functions
-        time_spent_by_section: {
-            "source": "BigQuery", 
-            "description": "User time spent by app section from Firebase Analytics",
-            "requirements": "Google Cloud credentials and BigQuery access"
-        },
-        time_spent_in_app: {
-            "source": "BigQuery",
-            "description": "App engagement time by user type (guest vs registered)",
-            "requirements": "Google Cloud credentials and BigQuery access"
-        },
-        search_statistics: {
-            "source": "BigQuery",
-            "description": "Search behavior and popular search terms",
-            "requirements": "Google Cloud credentials and BigQuery access"
-        },
-        push_notification: {
-            "source": "BigQuery",
-            "description": "Push notification delivery and open rates",
-            "requirements": "Google Cloud credentials and BigQuery access"
-        },
-        active_total_users: {
-            "source": "BigQuery",
-            "description": "Daily, Weekly, and Monthly Active User counts",
-            "requirements": "Google Cloud credentials and BigQuery access"
-        },
-        average_onboarding_time: {
-            "source": "BigQuery",
-            "description": "Average time to complete user onboarding",
-            "requirements": "Google Cloud credentials and BigQuery access"
-        },
-        average_appactivity_time: {
-            "source": "BigQuery",
-            "description": "Average total time users spend in app",
-            "requirements": "Google Cloud credentials and BigQuery access"
-        },
-        top_users_by_time_spent: {
-            "source": "BigQuery",
-            "description": "Most engaged users usage patterns",
-            "requirements": "Google Cloud credentials and BigQuery access"
-        },
-        section_visit: {
-            "source": "BigQuery",
-            "description": "User navigation patterns from home screen",
-            "requirements": "Google Cloud credentials and BigQuery access"
-        }
-    }
-    
-    # Handle Azure Analytics methods
-    if hasattr(func, '__self__') and isinstance(func.__self__, AzureAnalytics):
-        method_name = func.__name__
-        azure_methods = {
-            "get_content_creation_stats": {
-                "source": "Azure SQL Database",
-                "description": "Content creation activity: activities, posts, freebies",
-                "requirements": "Azure SQL Database connection and credentials"
-            },
-            "get_event_stats": {
-                "source": "Azure SQL Database",
-                "description": "Scheduled events and neighborhood participation",
-                "requirements": "Azure SQL Database connection and credentials"
-            },
-            "get_new_user_stats": {
-                "source": "Azure SQL Database",
-                "description": "New user registrations across time periods",
-                "requirements": "Azure SQL Database connection and credentials"
-            },
-            "get_historical_user_registration_data": {
-                "source": "Azure SQL Database",
-                "description": "Long-term user registration patterns and trends",
-                "requirements": "Azure SQL Database connection and credentials"
-            },
-            "get_neighborhood_stats": {
-                "source": "Azure SQL Database",
-                "description": "User distribution across neighborhoods",
-                "requirements": "Azure SQL Database connection and credentials"
-            },
-            "get_post_engagement_stats": {
-                "source": "Azure SQL Database",
-                "description": "Community interaction through posts and comments",
-                "requirements": "Azure SQL Database connection and credentials"
-            }
-        }
-        return azure_methods.get(method_name, {
-            "source": "Azure SQL Database",
-            "description": f"Azure analytics method: {method_name}",
-            "requirements": "Azure SQL Database connection and credentials"
-        })
-    
-    return function_map.get(func, {
-        "source": "Unknown",
-        "description": f"Analytics function: {getattr(func, '__name__', str(func))}",
-        "requirements": "Database connection and proper credentials"
-    })
+# Worker threads for report and cache writes; bounded so a large fan-out cannot
+# hold an open file descriptor per report at once
+MAX_CONCURRENT_WRITES = 4
+_WRITE_EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+    max_workers=MAX_CONCURRENT_WRITES, thread_name_prefix="report-writer"
+)
 
+# Lists longer than this are cut down before being sent to the LLM; the rows left
+# out are described by per-column statistics instead
+MAX_ROWS_FOR_LLM = 50
 
-# Import BAML client
-async def summarize_query(
-    query_name: str, description: str, raw_data: Any, data_type: str
-) -> str:
-    """Summarize analytics query using LLM."""
-    try:
-        return await b.SummarizeAnalyticsQuery(
-            query_name=query_name,
-            query_description=description,
-            raw_data=json.dumps(raw_data, indent=2, default=str),
-            data_type=data_type,
-        )
-    except Exception as e:
-        return f"Error summarizing {query_name}: {str(e)}"
+# Raw query results and LLM summaries are reused across runs from this directory
+CACHE_DIR = Path(".cache")
 
+# Raw query results younger than this are reused instead of re-querying the source
+RAW_DATA_TTL_HOURS = 6
 
-def get_analytics_categories() -> Dict[str, List[Tuple]]:
-    """Define analytics categories and their queries."""
-    azure_analytics = AzureAnalytics()
-    return {
-        "content": [
-            (
-                "content_creation",
-                "Content Creation Activity",
-                "New content creation: activities, posts, freebies",
-                "Content & Community Activity Metrics",
-                azure_analytics.get_content_creation_stats,
-            )
-        ],
-        "events": [
-            (
-                "upcoming_events",
-                "Upcoming Events & Activities",
-                "Scheduled events and neighborhood participation",
-                "Event Planning & Community Activity Metrics",
-                azure_analytics.get_event_stats,
-            )
-        ],
-        "registrations": [
-            (
-                "new_user_stats",
-                "New User Registration Statistics",
-                "New user registrations across time periods",
-                "User Acquisition & Growth Metrics",
-                azure_analytics.get_new_user_stats,
-            ),
-            (
-                "user_registration_trends",
-                "Historical User Registration Trends",
-                "Long-term user registration patterns and trends",
-                "User Growth & Trend Analysis",
-                azure_analytics.get_historical_user_registration_data,
-            ),
-        ],
-        "neighborhoods": [
-            (
-                "neighborhood_distribution",
-                "Neighborhood Statistics",
-                "User distribution across neighborhoods",
-                "Geographic & Community Distribution Metrics",
-                azure_analytics.get_neighborhood_stats,
-            )
-        ],
-        "engagement": [
-            (
-                "post_engagement",
-                "Post & Comment Engagement",
-                "Community interaction through posts and comments",
-                "Community Engagement & Interaction Metrics",
-                azure_analytics.get_post_engagement_stats,
-            ),
-            (
-                "time_by_section",
-                "Time Spent by App Section",
-                "User engagement time across app sections",
-                "User Engagement Metrics",
-                time_spent_by_section,
-            ),
-            (
-                "time_by_user_type",
-                "Time Spent by User Type",
-                "App engagement time: guest vs registered users",
-                "User Retention & Conversion Metrics",
-                time_spent_in_app,
-            ),
-            (
-                "push_notifications",
-                "Push Notification Performance",
-                "Push notification delivery and open rates",
-                "Communication & Engagement Metrics",
-                push_notification,
-            ),
-            (
-                "search_behavior",
-                "Search Statistics",
-                "User search behavior and popular search terms",
-                "User Intent & Behavior Metrics",
-                search_statistics,
-            ),
-            (
-                "app_activity_time",
-                "Average App Activity Time",
-                "Average total time users spend in app",
-                "User Engagement & Session Metrics",
-                average_appactivity_time,
-            ),
-        ],
-        "users": [
-            (
-                "active_users",
-                "Active Users Analysis",
-                "Daily, Weekly, and Monthly Active User counts",
-                "Core User Engagement Metrics",
-                active_total_users,
-            ),
-            (
-                "top_users",
-                "Top Engaged Users Analysis",
-                "Most engaged users usage patterns",
-                "Power User & Retention Metrics",
-                top_users_by_time_spent,
-            ),
-            (
-                "onboarding_performance",
-                "User Onboarding Performance",
-                "Average time to complete onboarding",
-                "User Acquisition & Conversion Metrics",
-                average_onboarding_time,
-            ),
-            (
-                "navigation_patterns",
-                "User Navigation Patterns",
-                "User navigation patterns from home screen",
-                "User Navigation & Discovery Metrics",
-                section_visit,
-            ),
-        ],
-    }
 
+# Report templates, filled in with str.format
+SUCCESS_TEMPLATE = """# {name}
 
-async def generate_category_files(output_dir: str) -> Tuple[Dict[str, Dict[str, str]], Dict[str, Dict[str, str]]]:
-    """Generate analytics files organized by category."""
-    print("📊 Generating Categorized Analytics Files...")
+**Category:** {category}
+**Generated:** {generated}
 
-    categories = get_analytics_categories()
-    saved_files = {}
-    failed_reports = {}
-    timestamp = datetime.now()
+## Analytics Summary
+
+{summary}
+
+---
+*Generated by ParentPass Analytics System*
+"""
 
-    for category, queries in categories.items():
-        print(f"\n📂 Generating {category.upper()} analytics...")
-        saved_files[category] = {}
-        failed_reports[category] = {}
-
-        for query_id, name, description, data_type, func in queries:
-            print(f"  📄 Generating {name}...")
-
-            try:
-                # Get raw data
-                raw_data = func()
-
-                # Handle special cases for single-value functions
-                if query_id in ["onboarding_performance", "app_activity_time"]:
-                    raw_data = {
-                        f"average_{query_id.replace('_performance', '')}_ms": raw_data
-                    }
-
-                # Check if data is valid
-                if not is_valid_data(raw_data):
-                    print(f"    ⚠️  No data returned for {name}")
-                    
-                    # Get function information for failure report
-                    func_info = get_function_info(func)
-                    
-                    # Create failure report
-                    filename = f"{query_id}_FAILED.md"
-                    filepath = os.path.join(output_dir, filename)
-                    
-                    content = f"""# {name} - DATA UNAVAILABLE
-
-**Category:** {category.title()}
+FAILED_TEMPLATE = """# {name} - DATA UNAVAILABLE
+
+**Category:** {category}
 **Status:** ❌ FAILED - No Data Available
-**Generated:** {timestamp.strftime('%Y-%m-%d %H:%M:%S')}
+**Generated:** {generated}
 
 ## Failure Details
 
-**Data Source:** {func_info.get('source', 'Unknown')}
-**Expected Data:** {func_info.get('description', 'No description available')}
-**Requirements:** {func_info.get('requirements', 'Unknown requirements')}
+**Data Source:** {source}
+**Expected Data:** {expected}
+**Requirements:** {requirements}
 
 ## Raw Response
 ```
-{raw_data if raw_data is not None else 'None'}
+{raw_data}
 ```
 
 ## Function Details
-- **Function:** {getattr(func, '__name__', str(func))}
-- **Module:** {getattr(func, '__module__', 'Unknown')}
+- **Function:** {function}
+- **Module:** {module}
 
 ## Troubleshooting
 1. Check database connection and credentials
@@ -353,69 +120,27 @@ async def generate_category_files(output_dir: str) -> Tuple[Dict[str, Dict[str,
 ---
 *Generated by ParentPass Analytics System - Failure Report*
 """
-                    
-                    with open(filepath, "w") as f:
-                        f.write(content)
-                    
-                    failed_reports[category][query_id] = filepath
-                    continue
-
-                # Summarize with LLM
-                summary = await summarize_query(name, description, raw_data, data_type)
-
-                # Save as markdown with clean filename
-                filename = f"{query_id}.md"
-                filepath = os.path.join(output_dir, filename)
 
-                content = f"""# {name}
+ERROR_TEMPLATE = """# {name} - ERROR
 
-**Category:** {category.title()}
-**Generated:** {timestamp.strftime('%Y-%m-%d %H:%M:%S')}
-
-## Analytics Summary
-
-{summary}
-
----
-*Generated by ParentPass Analytics System*
-"""
-
-                with open(filepath, "w") as f:
-                    f.write(content)
-
-                saved_files[category][query_id] = filepath
-                print(f"    ✅ Generated {name}")
-
-            except Exception as e:
-                print(f"    ❌ Error with {name}: {e}")
-                
-                # Get function information for failure report
-                func_info = get_function_info(func)
-                
-                # Create error report
-                filename = f"{query_id}_ERROR.md"
-                filepath = os.path.join(output_dir, filename)
-                
-                content = f"""# {name} - ERROR
-
-**Category:** {category.title()}
+**Category:** {category}
 **Status:** ❌ ERROR
-**Generated:** {timestamp.strftime('%Y-%m-%d %H:%M:%S')}
+**Generated:** {generated}
 
 ## Error Details
 
-**Data Source:** {func_info.get('source', 'Unknown')}
-**Expected Data:** {func_info.get('description', 'No description available')}
-**Requirements:** {func_info.get('requirements', 'Unknown requirements')}
+**Data Source:** {source}
+**Expected Data:** {expected}
+**Requirements:** {requirements}
 
 ## Error Message
 ```
-{str(e)}
+{error}
 ```
 
 ## Function Details
-- **Function:** {getattr(func, '__name__', str(func))}
-- **Module:** {getattr(func, '__module__', 'Unknown')}
+- **Function:** {function}
+- **Module:** {module}
 
 ## Troubleshooting
 1. Check the error message above for specific issues
@@ -426,13 +151,532 @@ async def generate_category_files(output_dir: str) -> Tuple[Dict[str, Dict[str,
 ---
 *Generated by ParentPass Analytics System - Error Report*
 """
-                
-                with open(filepath, "w") as f:
-                    f.write(content)
-                
-                failed_reports[category][query_id] = filepath
 
-    return saved_files, failed_reports
+
+class LLMThrottle:
+    """Caps concurrent LLM calls and paces call starts with a token bucket.
+
+    The bucket holds up to requests_per_minute tokens and refills continuously,
+    so short bursts go out immediately while sustained load stays under the
+    provider's RPM limit.
+    """
+
+    def __init__(self, max_concurrent: int, requests_per_minute: int):
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._rate = requests_per_minute / 60.0
+        self._capacity = float(requests_per_minute)
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def _take_token(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self._capacity, self._tokens + (now - self._updated) * self._rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+    async def __aenter__(self) -> "LLMThrottle":
+        await self._semaphore.acquire()
+        try:
+            await self._take_token()
+        except BaseException:
+            self._semaphore.release()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        self._semaphore.release()
+
+
+def is_valid_data(data: Any) -> bool:
+    """Check if data is valid for analysis."""
+    if data is None:
+        return False
+    if isinstance(data, (list, dict)) and len(data) == 0:
+        return False
+    if isinstance(data, str) and data.strip() == "":
+        return False
+    return True
+
+
+def _write_file(filepath: str, content: str) -> None:
+    """Write a file atomically, so readers never see a partially written report."""
+    # The temporary file sits next to the target so the rename stays on one filesystem
+    tmp_path = f"{filepath}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(content)
+    os.replace(tmp_path, filepath)
+
+
+async def _write_file_async(filepath: str, content: str) -> None:
+    """Write a file on the bounded writer pool without blocking the event loop."""
+    await asyncio.get_running_loop().run_in_executor(
+        _WRITE_EXECUTOR, _write_file, filepath, content
+    )
+
+
+def get_function_info(func) -> Dict[str, str]:
+    """Get information about a function for error reporting."""
+    meta = getattr(func, "_analytics_meta", None)
+    if meta is not None:
+        return meta
+    return {
+        "source": "Unknown",
+        "description": f"Analytics function: {getattr(func, '__name__', str(func))}",
+        "requirements": "Database connection and proper credentials"
+    }
+
+
+def _cache_get_or_compute(query_id: str, func, ttl_hours: float = RAW_DATA_TTL_HOURS) -> Any:
+    """Return func()'s cached result if fresh, otherwise call it and cache valid data."""
+    cache_path = CACHE_DIR / f"{query_id}.pkl"
+    try:
+        if time.time() - cache_path.stat().st_mtime < ttl_hours * 3600:
+            with open(cache_path, "rb") as f:
+                return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        pass
+
+    raw_data = func()
+    # Empty results are not cached so the next run retries the source
+    if is_valid_data(raw_data):
+        CACHE_DIR.mkdir(exist_ok=True)
+        with open(cache_path, "wb") as f:
+            pickle.dump(raw_data, f)
+    return raw_data
+
+
+def _column_stats(rows: List[Any]) -> Dict[str, Dict[str, float]]:
+    """Count, sum, min, max and mean for every numeric column of a list of dicts."""
+    columns: Dict[str, List[float]] = {}
+    for row in rows:
+        if not isinstance(row, dict):
+            continue
+        for key, value in row.items():
+            if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+                columns.setdefault(key, []).append(float(value))
+
+    return {
+        key: {
+            "count": len(values),
+            "sum": sum(values),
+            "min": min(values),
+            "max": max(values),
+            "mean": statistics.fmean(values),
+        }
+        for key, values in columns.items()
+    }
+
+
+def shrink_for_llm(data: Any, max_rows: int = MAX_ROWS_FOR_LLM) -> Any:
+    """Truncate long lists, replacing the dropped rows with summary statistics."""
+    if isinstance(data, dict):
+        return {key: shrink_for_llm(value, max_rows) for key, value in data.items()}
+    if isinstance(data, list):
+        shrunk = [shrink_for_llm(item, max_rows) for item in data[:max_rows]]
+        if len(data) > max_rows:
+            shrunk.append(
+                {
+                    "_omitted_rows": len(data) - max_rows,
+                    "_total_rows": len(data),
+                    # Computed over every row, including the omitted ones
+                    "_column_stats": _column_stats(data),
+                }
+            )
+        return shrunk
+    return data
+
+
+def serialize_raw_data(raw_data: Any) -> str:
+    """Serialize query results for the LLM prompt."""
+    try:
+        return orjson.dumps(
+            raw_data,
+            default=str,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS,
+        ).decode()
+    except TypeError:
+        # orjson rejects a few shapes json accepts, e.g. integers beyond 64 bits
+        return json.dumps(raw_data, indent=2, default=str)
+
+
+def _summary_cache_path(
+    query_name: str, description: str, data_type: str, payload: str
+) -> Path:
+    """Cache location for a summary, keyed by the query metadata and its data."""
+    digest = hashlib.blake2b(
+        "\0".join((query_name, description, data_type, payload)).encode(),
+        digest_size=16,
+    ).hexdigest()
+    return CACHE_DIR / f"summary_{digest}.md"
+
+
+async def _read_cached_summary(cache_path: Path) -> Optional[str]:
+    try:
+        return await asyncio.to_thread(cache_path.read_text)
+    except OSError:
+        return None
+
+
+async def _store_summary(cache_path: Path, summary: str) -> None:
+    CACHE_DIR.mkdir(exist_ok=True)
+    await _write_file_async(str(cache_path), summary)
+
+
+async def _summarize_payload(
+    query_name: str, description: str, data_type: str, payload: str, cache_path: Path
+) -> str:
+    """Call SummarizeAnalyticsQuery for a serialized payload and cache the result."""
+    try:
+        summary = await b.SummarizeAnalyticsQuery(
+            query_name=query_name,
+            query_description=description,
+            raw_data=payload,
+            data_type=data_type,
+        )
+    except Exception as e:
+        return f"Error summarizing {query_name}: {str(e)}"
+
+    await _store_summary(cache_path, summary)
+    return summary
+
+
+async def summarize_query(
+    query_name: str, description: str, raw_data: Any, data_type: str
+) -> str:
+    """Summarize analytics query using LLM, reusing the summary if the data is unchanged."""
+    payload = serialize_raw_data(shrink_for_llm(raw_data))
+    cache_path = _summary_cache_path(query_name, description, data_type, payload)
+    cached = await _read_cached_summary(cache_path)
+    if cached is not None:
+        return cached
+    return await _summarize_payload(
+        query_name, description, data_type, payload, cache_path
+    )
+
+
+async def summarize_queries(
+    queries: List[Tuple[str, str, str, str, Any]], llm_throttle: LLMThrottle
+) -> Dict[str, str]:
+    """Summarize (query_id, name, description, data_type, raw_data) entries.
+
+    Cache misses are summarized together in a single SummarizeAnalyticsQueriesBatch
+    call; anything the batch leaves out falls back to a per-query call.
+    """
+    summaries: Dict[str, str] = {}
+    pending = []
+    for query_id, name, description, data_type, raw_data in queries:
+        payload = serialize_raw_data(shrink_for_llm(raw_data))
+        cache_path = _summary_cache_path(name, description, data_type, payload)
+        cached = await _read_cached_summary(cache_path)
+        if cached is not None:
+            summaries[query_id] = cached
+        else:
+            pending.append((query_id, name, description, data_type, payload, cache_path))
+
+    if not pending:
+        return summaries
+
+    print(f"  🧠 Summarizing {len(pending)} reports in one batch...")
+    try:
+        async with llm_throttle:
+            batch = await b.SummarizeAnalyticsQueriesBatch(
+                queries=[
+                    AnalyticsQueryInput(
+                        query_id=query_id,
+                        query_name=name,
+                        query_description=description,
+                        raw_data=payload,
+                        data_type=data_type,
+                    )
+                    for query_id, name, description, data_type, payload, _ in pending
+                ]
+            )
+    except Exception as e:
+        print(f"    ⚠️  Batch summarization failed, summarizing individually: {e}")
+        batch = {}
+
+    async def summarize_one(query_id, name, description, data_type, payload, cache_path):
+        summary = batch.get(query_id)
+        if summary:
+            await _store_summary(cache_path, summary)
+        else:
+            async with llm_throttle:
+                summary = await _summarize_payload(
+                    name, description, data_type, payload, cache_path
+                )
+        summaries[query_id] = summary
+
+    await asyncio.gather(*(summarize_one(*entry) for entry in pending))
+    return summaries
+
+
+# AzureAnalytics only holds a reference to the shared connection pool, so one
+# instance serves every query; nothing connects until a query runs
+_azure_analytics = AzureAnalytics()
+
+# (query_id, name, description, data_type, func)
+AnalyticsQuery = Tuple[str, str, str, str, Callable[[], Any]]
+
+# Analytics categories and their queries
+ANALYTICS_CATEGORIES: Dict[str, Tuple[AnalyticsQuery, ...]] = {
+    "content": (
+        (
+            "content_creation",
+            "Content Creation Activity",
+            "New content creation: activities, posts, freebies",
+            "Content & Community Activity Metrics",
+            _azure_analytics.get_content_creation_stats,
+        ),
+    ),
+    "events": (
+        (
+            "upcoming_events",
+            "Upcoming Events & Activities",
+            "Scheduled events and neighborhood participation",
+            "Event Planning & Community Activity Metrics",
+            _azure_analytics.get_event_stats,
+        ),
+    ),
+    "registrations": (
+        (
+            "new_user_stats",
+            "New User Registration Statistics",
+            "New user registrations across time periods",
+            "User Acquisition & Growth Metrics",
+            _azure_analytics.get_new_user_stats,
+        ),
+        (
+            "user_registration_trends",
+            "Historical User Registration Trends",
+            "Long-term user registration patterns and trends",
+            "User Growth & Trend Analysis",
+            _azure_analytics.get_historical_user_registration_data,
+        ),
+    ),
+    "neighborhoods": (
+        (
+            "neighborhood_distribution",
+            "Neighborhood Statistics",
+            "User distribution across neighborhoods",
+            "Geographic & Community Distribution Metrics",
+            _azure_analytics.get_neighborhood_stats,
+        ),
+    ),
+    "engagement": (
+        (
+            "post_engagement",
+            "Post & Comment Engagement",
+            "Community interaction through posts and comments",
+            "Community Engagement & Interaction Metrics",
+            _azure_analytics.get_post_engagement_stats,
+        ),
+        (
+            "time_by_section",
+            "Time Spent by App Section",
+            "User engagement time across app sections",
+            "User Engagement Metrics",
+            time_spent_by_section,
+        ),
+        (
+            "time_by_user_type",
+            "Time Spent by User Type",
+            "App engagement time: guest vs registered users",
+            "User Retention & Conversion Metrics",
+            time_spent_in_app,
+        ),
+        (
+            "push_notifications",
+            "Push Notification Performance",
+            "Push notification delivery and open rates",
+            "Communication & Engagement Metrics",
+            push_notification,
+        ),
+        (
+            "search_behavior",
+            "Search Statistics",
+            "User search behavior and popular search terms",
+            "User Intent & Behavior Metrics",
+            search_statistics,
+        ),
+        (
+            "app_activity_time",
+            "Average App Activity Time",
+            "Average total time users spend in app",
+            "User Engagement & Session Metrics",
+            average_appactivity_time,
+        ),
+    ),
+    "users": (
+        (
+            "active_users",
+            "Active Users Analysis",
+            "Daily, Weekly, and Monthly Active User counts",
+            "Core User Engagement Metrics",
+            active_total_users,
+        ),
+        (
+            "top_users",
+            "Top Engaged Users Analysis",
+            "Most engaged users usage patterns",
+            "Power User & Retention Metrics",
+            top_users_by_time_spent,
+        ),
+        (
+            "onboarding_performance",
+            "User Onboarding Performance",
+            "Average time to complete onboarding",
+            "User Acquisition & Conversion Metrics",
+            average_onboarding_time,
+        ),
+        (
+            "navigation_patterns",
+            "User Navigation Patterns",
+            "User navigation patterns from home screen",
+            "User Navigation & Discovery Metrics",
+            section_visit,
+        ),
+    ),
+}
+
+
+def get_analytics_categories() -> Dict[str, Tuple[AnalyticsQuery, ...]]:
+    """Define analytics categories and their queries."""
+    return ANALYTICS_CATEGORIES
+
+
+async def fetch_raw_data(query_id: str, func) -> Any:
+    """Run a query function on the worker pool, using the raw data cache."""
+    raw_data = await asyncio.get_running_loop().run_in_executor(
+        _EXECUTOR, _cache_get_or_compute, query_id, func
+    )
+
+    # Handle special cases for single-value functions
+    if query_id in ["onboarding_performance", "app_activity_time"]:
+        raw_data = {f"average_{query_id.replace('_performance', '')}_ms": raw_data}
+
+    return raw_data
+
+
+async def write_report(
+    category: str,
+    query_id: str,
+    name: str,
+    description: str,
+    data_type: str,
+    func,
+    raw_data: Any,
+    summary: Optional[str],
+    output_dir: str,
+    generated: str,
+) -> Tuple[str, str, str, Optional[str]]:
+    """Write a single report; returns (category, query_id, filepath, failed_source).
+
+    raw_data is the exception raised while fetching, if the fetch failed.
+    failed_source is the data source of a failed report, or None on success.
+    """
+    if isinstance(raw_data, BaseException) or not is_valid_data(raw_data):
+        # Get function information for failure report
+        func_info = get_function_info(func)
+        details = dict(
+            name=name,
+            category=category.title(),
+            generated=generated,
+            source=func_info.get("source", "Unknown"),
+            expected=func_info.get("description", "No description available"),
+            requirements=func_info.get("requirements", "Unknown requirements"),
+            function=getattr(func, "__name__", str(func)),
+            module=getattr(func, "__module__", "Unknown"),
+        )
+
+        if isinstance(raw_data, BaseException):
+            print(f"    ❌ Error with {name}: {raw_data}")
+            filename = f"{query_id}_ERROR.md"
+            content = ERROR_TEMPLATE.format(error=str(raw_data), **details)
+        else:
+            print(f"    ⚠️  No data returned for {name}")
+            filename = f"{query_id}_FAILED.md"
+            content = FAILED_TEMPLATE.format(raw_data=raw_data, **details)
+
+        filepath = os.path.join(output_dir, filename)
+        await _write_file_async(filepath, content)
+        return category, query_id, filepath, details["source"]
+
+    # Save as markdown with clean filename
+    filepath = os.path.join(output_dir, f"{query_id}.md")
+    content = SUCCESS_TEMPLATE.format(
+        name=name, category=category.title(), generated=generated, summary=summary
+    )
+
+    await _write_file_async(filepath, content)
+    print(f"    ✅ Generated {name}")
+    return category, query_id, filepath, None
+
+
+async def generate_category_files(
+    output_dir: str,
+) -> Tuple[Dict[str, Dict[str, str]], Dict[str, Dict[str, str]], Counter]:
+    """Generate analytics files organized by category.
+
+    Returns the saved reports, the failed reports, and failure counts per data source.
+    """
+    print("📊 Generating Categorized Analytics Files...")
+
+    categories = get_analytics_categories()
+    saved_files = {category: {} for category in categories}
+    failed_reports = {category: {} for category in categories}
+    source_failures = Counter()
+    timestamp = datetime.now()
+    llm_throttle = LLMThrottle(MAX_CONCURRENT_SUMMARIES, LLM_REQUESTS_PER_MINUTE)
+    jobs = [
+        (category, *query)
+        for category, queries in categories.items()
+        for query in queries
+    ]
+
+    # Phase 1: run every query concurrently
+    print(f"  📄 Fetching data for {len(jobs)} reports...")
+    raw_results = await asyncio.gather(
+        *(fetch_raw_data(query_id, func) for _, query_id, *_, func in jobs),
+        return_exceptions=True,
+    )
+
+    # Phase 2: summarize everything that returned usable data
+    summaries = await summarize_queries(
+        [
+            (query_id, name, description, data_type, raw_data)
+            for (_, query_id, name, description, data_type, _), raw_data in zip(
+                jobs, raw_results
+            )
+            if not isinstance(raw_data, BaseException) and is_valid_data(raw_data)
+        ],
+        llm_throttle,
+    )
+
+    # Phase 3: write success, failure, and error reports
+    generated = timestamp.strftime("%Y-%m-%d %H:%M:%S")
+    results = await asyncio.gather(
+        *(
+            write_report(*job, raw_data, summaries.get(job[1]), output_dir, generated)
+            for job, raw_data in zip(jobs, raw_results)
+        )
+    )
+
+    for category, query_id, filepath, failed_source in results:
+        if failed_source is None:
+            saved_files[category][query_id] = filepath
+        else:
+            failed_reports[category][query_id] = filepath
+            source_failures[failed_source] += 1
+
+    return saved_files, failed_reports, source_failures
 
 
 async def main():
@@ -446,7 +690,9 @@ async def main():
 
     try:
         # Generate files by category
-        saved_files, failed_reports = await generate_category_files(output_dir)
+        saved_files, failed_reports, source_failures = await generate_category_files(
+            output_dir
+        )
 
         successful_files = sum(len(files) for files in saved_files.values())
         failed_files = sum(len(files) for files in failed_reports.values())
@@ -476,16 +722,8 @@ async def main():
                         print(f"     - {query_id}")
 
         # Show data source summary
-        bigquery_failures = 0
-        azure_failures = 0
-        for category_failures in failed_reports.values():
-            for filepath in category_failures.values():
-                with open(filepath, 'r') as f:
-                    content = f.read()
-                    if "BigQuery" in content:
-                        bigquery_failures += 1
-                    elif "Azure SQL" in content:
-                        azure_failures += 1
+        bigquery_failures = source_failures[BIGQUERY_SOURCE]
+        azure_failures = source_failures[AZURE_SOURCE]
 
         if bigquery_failures > 0 or azure_failures > 0:
             print(f"\n🔍 Data Source Issues:")
@@ -498,6 +736,16 @@ async def main():
         print(f"\n❌ Critical Error: {e}")
         sys.exit(1)
 
+    finally:
+        _EXECUTOR.shutdown(wait=False)
+        _WRITE_EXECUTOR.shutdown(wait=False)
+
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # Prefer uvloop's faster event loop when it is installed
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        uvloop.run(main())
@@ -7,50 +7,46 @@ This script tests the analytics API by:
 2. Asking various analytics questions
 3. Logging all results to a file
 
-No BAML dependencies required - just standard HTTP requests.
+No BAML dependencies required - just HTTP requests over a pooled httpx client.
 """
 
-import requests
+import asyncio
+import httpx
+import importlib.util
 import time
 from datetime import datetime
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, TextIO, Tuple
 
 # Configuration
 API_BASE_URL = "http://localhost:8000/api"
 API_KEY = os.getenv("PP_API_KEY", "dev-api-key-12345")
 LOG_FILE = f"api_test_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
 
-# Test questions covering different analytics types
-TEST_QUESTIONS = [
-    # CONTENT type questions
-    "How much content has been created recently?",
-    "What types of posts are being made?",
-    "How many activities were created this week?",
-    # EVENTS type questions
-    "What events are coming up?",
-    "How many events are scheduled?",
-    "Are there any upcoming activities?",
-    # REGISTRATIONS type questions
-    "How many new users signed up this month?",
-    "What's our user growth looking like?",
-    "Show me registration trends",
-    # NEIGHBORHOODS type questions
-    "Which neighborhoods are most active?",
-    "How are users distributed geographically?",
-    "What's the neighborhood breakdown?",
-    # ENGAGEMENT type questions
-    "How engaged are our users?",
-    "What's the average time spent in the app?",
-    "How are push notifications performing?",
-    "What are users searching for?",
-    # USERS type questions
-    "How many daily active users do we have?",
-    "Show me our user activity metrics",
-    "Who are our most engaged users?",
-    # General questions
-    "Give me an overview of the platform",
-    "What should I know about ParentPass performance?",
+# Test questions covering different analytics types, tagged with the category
+# they exercise so questions touching the same data can be sent back to back
+TEST_QUESTIONS: List[Tuple[str, str]] = [
+    ("CONTENT", "How much content has been created recently?"),
+    ("CONTENT", "What types of posts are being made?"),
+    ("CONTENT", "How many activities were created this week?"),
+    ("EVENTS", "What events are coming up?"),
+    ("EVENTS", "How many events are scheduled?"),
+    ("EVENTS", "Are there any upcoming activities?"),
+    ("REGISTRATIONS", "How many new users signed up this month?"),
+    ("REGISTRATIONS", "What's our user growth looking like?"),
+    ("REGISTRATIONS", "Show me registration trends"),
+    ("NEIGHBORHOODS", "Which neighborhoods are most active?"),
+    ("NEIGHBORHOODS", "How are users distributed geographically?"),
+    ("NEIGHBORHOODS", "What's the neighborhood breakdown?"),
+    ("ENGAGEMENT", "How engaged are our users?"),
+    ("ENGAGEMENT", "What's the average time spent in the app?"),
+    ("ENGAGEMENT", "How are push notifications performing?"),
+    ("ENGAGEMENT", "What are users searching for?"),
+    ("USERS", "How many daily active users do we have?"),
+    ("USERS", "Show me our user activity metrics"),
+    ("USERS", "Who are our most engaged users?"),
+    ("GENERAL", "Give me an overview of the platform"),
+    ("GENERAL", "What should I know about ParentPass performance?"),
 ]
 
 
@@ -64,23 +60,52 @@ class APITester:
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json",
         }
+        self.client: Optional[httpx.AsyncClient] = None
+        self._log_fp: Optional[TextIO] = None
+
+    async def __aenter__(self) -> "APITester":
+        # One pooled client so every request reuses a keep-alive connection.
+        # HTTP/2 is only negotiated over TLS and needs the optional h2 package
+        http2 = (
+            self.base_url.startswith("https://")
+            and importlib.util.find_spec("h2") is not None
+        )
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=self.headers,
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=20),
+            http2=http2,
+        )
+        # Keep the log open for the whole run instead of reopening it per line
+        self._log_fp = open(self.log_file, "a", encoding="utf-8", buffering=64 * 1024)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.client.aclose()
+        self.client = None
+        self._log_fp.close()
+        self._log_fp = None
 
     def log(self, message: str, also_print: bool = True):
         """Log message to file and optionally print to console."""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         log_entry = f"[{timestamp}] {message}"
 
-        with open(self.log_file, "a", encoding="utf-8") as f:
-            f.write(log_entry + "\n")
+        if self._log_fp is not None:
+            self._log_fp.write(log_entry + "\n")
+        else:
+            with open(self.log_file, "a", encoding="utf-8") as f:
+                f.write(log_entry + "\n")
 
         if also_print:
             print(log_entry)
 
-    def test_health(self) -> bool:
+    async def test_health(self) -> bool:
         """Test the health endpoint."""
         self.log("Testing health endpoint...")
         try:
-            response = requests.get(f"{self.base_url}/health", headers=self.headers)
+            response = await self.client.get("/health")
             if response.status_code == 200:
                 self.log(f"✅ Health check passed: {response.json()}")
                 return True
@@ -93,11 +118,11 @@ class APITester:
             self.log(f"❌ Health check error: {str(e)}")
             return False
 
-    def create_session(self) -> bool:
+    async def create_session(self) -> bool:
         """Create a new session."""
         self.log("Creating new session...")
         try:
-            response = requests.post(f"{self.base_url}/sessions", headers=self.headers)
+            response = await self.client.post("/sessions")
             if response.status_code == 201:
                 data = response.json()
                 self.session_id = data["session_id"]
@@ -112,21 +137,21 @@ class APITester:
             self.log(f"❌ Session creation error: {str(e)}")
             return False
 
-    def ask_question(self, question: str) -> Dict[str, Any]:
+    async def ask_question(self, question: str, category: str) -> Dict[str, Any]:
         """Ask a question to the chatbot."""
         if not self.session_id:
             return {"error": "No active session"}
 
         self.log(f"Asking: {question}")
 
-        headers_with_session = {**self.headers, "X-Session-ID": self.session_id}
+        session_headers = {"X-Session-ID": self.session_id}
 
         payload = {"message": question}
 
         try:
             start_time = time.time()
-            response = requests.post(
-                f"{self.base_url}/query", headers=headers_with_session, json=payload
+            response = await self.client.post(
+                "/query", headers=session_headers, json=payload
             )
             end_time = time.time()
             response_time = end_time - start_time
@@ -136,6 +161,7 @@ class APITester:
                 self.log(f"✅ Response ({response_time:.2f}s): {data['response']}")
                 return {
                     "success": True,
+                    "category": category,
                     "question": question,
                     "response": data["response"],
                     "response_time": response_time,
@@ -145,6 +171,7 @@ class APITester:
                 self.log(f"❌ {error_msg}")
                 return {
                     "success": False,
+                    "category": category,
                     "question": question,
                     "error": error_msg,
                     "response_time": response_time,
@@ -153,17 +180,20 @@ class APITester:
         except Exception as e:
             error_msg = f"Query error: {str(e)}"
             self.log(f"❌ {error_msg}")
-            return {"success": False, "question": question, "error": error_msg}
-
-    def get_session_state(self) -> Dict[str, Any]:
+            return {
+                "success": False,
+                "category": category,
+                "question": question,
+                "error": error_msg,
+            }
+
+    async def get_session_state(self) -> Dict[str, Any]:
         """Get current session state."""
         if not self.session_id:
             return {"error": "No active session"}
 
         try:
-            response = requests.get(
-                f"{self.base_url}/sessions/{self.session_id}", headers=self.headers
-            )
+            response = await self.client.get(f"/sessions/{self.session_id}")
             if response.status_code == 200:
                 return response.json()
             else:
@@ -171,19 +201,19 @@ class APITester:
         except Exception as e:
             return {"error": str(e)}
 
-    def run_full_test(self):
+    async def run_full_test(self):
         """Run the complete test suite."""
         self.log("=" * 60)
         self.log("Starting ParentPass Analytics API Test")
         self.log("=" * 60)
 
         # Test health
-        if not self.test_health():
+        if not await self.test_health():
             self.log("❌ Health check failed, aborting tests")
             return
 
         # Create session
-        if not self.create_session():
+        if not await self.create_session():
             self.log("❌ Session creation failed, aborting tests")
             return
 
@@ -192,13 +222,21 @@ class APITester:
         self.log(f"\nTesting {len(TEST_QUESTIONS)} questions...")
         self.log("-" * 40)
 
-        for i, question in enumerate(TEST_QUESTIONS, 1):
-            self.log(f"\n[Question {i}/{len(TEST_QUESTIONS)}]")
-            result = self.ask_question(question)
-            results.append(result)
-
-            # Brief pause between questions
-            time.sleep(1)
+        # Send each category's questions as one burst so server-side caches for
+        # that analytics data stay warm between consecutive questions
+        grouped: Dict[str, List[str]] = {}
+        for category, question in TEST_QUESTIONS:
+            grouped.setdefault(category, []).append(question)
+
+        # Questions share one conversation, which the server processes one turn
+        # at a time, so they are sent in order without an artificial pause
+        i = 0
+        for category, questions in grouped.items():
+            for question in questions:
+                i += 1
+                self.log(f"\n[Question {i}/{len(TEST_QUESTIONS)}] ({category})")
+                result = await self.ask_question(question, category)
+                results.append(result)
 
         # Summary
         self.log("\n" + "=" * 60)
@@ -217,9 +255,14 @@ class APITester:
         self.log(f"Success rate: {successful/len(results)*100:.1f}%")
         self.log(f"Average response time: {avg_response_time:.2f}s")
 
+        for category in grouped:
+            category_results = [r for r in results if r["category"] == category]
+            passed = sum(1 for r in category_results if r.get("success", False))
+            self.log(f"  {category}: {passed}/{len(category_results)} successful")
+
         # Get final session state
         self.log("\nFinal session state:")
-        session_state = self.get_session_state()
+        session_state = await self.get_session_state()
         if "error" not in session_state:
             message_count = len(
                 session_state.get("state", {}).get("recent_messages", [])
@@ -229,14 +272,14 @@ class APITester:
         self.log(f"\nTest completed. Results logged to: {self.log_file}")
 
 
-def main():
+async def main():
     """Main function to run the API test."""
     print("ParentPass Analytics API Tester")
     print("=" * 40)
 
     # Check if server is likely running
     try:
-        requests.get("http://localhost:8000/api/health", timeout=5)
+        httpx.get("http://localhost:8000/api/health", timeout=5)
         print("✅ Server appears to be running")
     except Exception:
         print("⚠️  Warning: Server may not be running at localhost:8000")
@@ -245,15 +288,19 @@ def main():
         if choice.lower() != "y":
             return
 
-    # Initialize tester
-    tester = APITester(API_BASE_URL, API_KEY, LOG_FILE)
-
     print(f"Logging results to: {LOG_FILE}")
     print("Starting tests...\n")
 
-    # Run tests
-    tester.run_full_test()
+    # Initialize tester and run tests
+    async with APITester(API_BASE_URL, API_KEY, LOG_FILE) as tester:
+        await tester.run_full_test()
 
 
 if __name__ == "__main__":
-    main()
+    # Prefer uvloop's faster event loop when it is installed
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        uvloop.run(main())
@@ -6,14 +6,39 @@ and ensures consistent test setup across all test modules.
 
 import os
 import asyncio
-from typing import Dict, Any, Generator, AsyncGenerator
-from unittest.mock import Mock, patch
+from typing import Dict, Any, Generator, AsyncGenerator, Mapping
+from types import MappingProxyType, SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
 import pytest
 from fastapi.testclient import TestClient
-from httpx import AsyncClient
+from httpx import ASGITransport, AsyncClient
 from app.main import app
+from app.routers import queries, sessions
 from baml_client.types import Message, State, AnalyticsQuestion, AnalyticsCategory
 
+# One in-process transport shared by every async test client
+_ASGI_TRANSPORT = ASGITransport(app=app)
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--run-slow", action="store_true", help="Also run tests marked as slow"
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: expensive test, run with --run-slow")
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip slow tests unless --run-slow is given."""
+    if config.getoption("--run-slow"):
+        return
+    skip_slow = pytest.mark.skip(reason="needs --run-slow")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip_slow)
+
 
 # Import the FastAPI app
 @pytest.fixture(scope="session")
@@ -24,69 +49,79 @@ def event_loop():
     loop.close()
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def test_api_key() -> str:
     """Provide a test API key for authentication."""
     return "test-api-key-12345"
 
 
-@pytest.fixture
-def auth_headers(test_api_key: str) -> Dict[str, str]:
-    """Provide authentication headers for API requests."""
-    return {
-        "Authorization": f"Bearer {test_api_key}",
-        "Content-Type": "application/json",
-    }
+@pytest.fixture(scope="session")
+def auth_headers(test_api_key: str) -> Mapping[str, str]:
+    """Provide authentication headers for API requests, read-only and shared."""
+    return MappingProxyType(
+        {
+            "Authorization": f"Bearer {test_api_key}",
+            "Content-Type": "application/json",
+        }
+    )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session", autouse=True)
 def mock_env_vars(test_api_key: str) -> Generator[None, None, None]:
-    """Mock environment variables for testing."""
+    """Set the test API key for the whole session; restored on teardown.
+
+    The API key is read from the environment on every request, so tests that
+    patch os.environ themselves still see their own values.
+    """
     with patch.dict(os.environ, {"PP_API_KEY": test_api_key}):
         yield
 
 
-@pytest.fixture
-def client(mock_env_vars) -> TestClient:
-    """Provide a test client for the FastAPI app."""
+@pytest.fixture(scope="session")
+def client() -> TestClient:
+    """Provide a test client for the FastAPI app, shared by every test."""
     return TestClient(app)
 
 
-@pytest.fixture
-async def async_client(mock_env_vars) -> AsyncGenerator[AsyncClient, None]:
-    """Provide an async test client for the FastAPI app."""
-    async with AsyncClient(app=app, base_url="http://test") as ac:
+@pytest.fixture(scope="session")
+async def async_client() -> AsyncGenerator[AsyncClient, None]:
+    """Provide an async test client for the FastAPI app, shared by every test."""
+    async with AsyncClient(transport=_ASGI_TRANSPORT, base_url="http://test") as ac:
         yield ac
 
 
 @pytest.fixture
-def mock_session_store(sample_state):
+def mock_session_store(monkeypatch, sample_state):
     """Mock the session store to avoid external dependencies."""
-    with patch("app.routers.sessions.session_store") as mock_store_sessions, \
-         patch("app.routers.queries.session_store") as mock_store_queries:
-        # Configure mock behavior to return proper State objects
-        mock_store_sessions.get_state.return_value = sample_state
-        mock_store_sessions.delete_session.return_value = None
-        mock_store_queries.get_state.return_value = sample_state
-        mock_store_queries.delete_session.return_value = None
-        
-        # Make both mocks return the same thing when modified
-        def sync_mocks(new_state):
-            mock_store_sessions.get_state.return_value = new_state
-            mock_store_queries.get_state.return_value = new_state
-        
-        mock_store_sessions.sync_state = sync_mocks
-        yield mock_store_sessions
+    # One mock serves both routers, swapped in by plain attribute assignment
+    mock_store = MagicMock()
+    mock_store.get_state = AsyncMock(return_value=sample_state)
+    mock_store.set_state = AsyncMock(return_value=None)
+    mock_store.delete_session = AsyncMock(return_value=None)
+
+    def sync_state(new_state):
+        mock_store.get_state.return_value = new_state
+
+    mock_store.sync_state = sync_state
+    monkeypatch.setattr(sessions, "session_store", mock_store)
+    monkeypatch.setattr(queries, "session_store", mock_store)
+    return mock_store
 
 
 @pytest.fixture
-def mock_baml_client():
+def mock_baml_client(monkeypatch):
     """Mock the BAML client to avoid external AI API calls."""
-    with patch("app.routers.queries.b") as mock_baml:
-        yield mock_baml
+    # Only the functions the queries router calls; tests replace them as needed
+    mock_baml = SimpleNamespace(
+        Chat=AsyncMock(),
+        AnswerAnalyticsQuestion=AsyncMock(),
+        stream=SimpleNamespace(Chat=Mock(), AnswerAnalyticsQuestion=Mock()),
+    )
+    monkeypatch.setattr(queries, "b", mock_baml)
+    return mock_baml
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_analytics_data() -> Dict[str, Any]:
     """Provide sample analytics data for testing."""
     return {
@@ -97,14 +132,14 @@ def sample_analytics_data() -> Dict[str, Any]:
 
 
 @pytest.fixture
-def mock_analytics_loader(sample_analytics_data):
+def mock_analytics_loader(monkeypatch, sample_analytics_data):
     """Mock the analytics data loader."""
-    with patch("app.routers.queries.get_analytics_data_for_category") as mock_loader:
-        mock_loader.return_value = sample_analytics_data
-        yield mock_loader
+    mock_loader = Mock(return_value=sample_analytics_data)
+    monkeypatch.setattr(queries, "get_analytics_data_for_category", mock_loader)
+    return mock_loader
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_message() -> Message:
     """Provide a sample BAML Message for testing."""
     return Message(
@@ -113,7 +148,7 @@ def sample_message() -> Message:
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_analytics_question() -> AnalyticsQuestion:
     """Provide a sample BAML AnalyticsQuestion for testing."""
     return AnalyticsQuestion(
@@ -123,7 +158,10 @@ def sample_analytics_question() -> AnalyticsQuestion:
 
 @pytest.fixture
 def sample_state() -> State:
-    """Provide a sample BAML State for testing."""
+    """Provide a sample BAML State for testing.
+
+    Function-scoped because query handlers append to the state's messages.
+    """
     state = State(
         recent_messages=[
             Message(role="assistant", content="Welcome! How can I help you today?")
@@ -133,18 +171,22 @@ def sample_state() -> State:
 
 
 @pytest.fixture
+def empty_state() -> State:
+    """Provide a BAML State with no conversation history."""
+    return State(recent_messages=[])
+
+
+@pytest.fixture(scope="session")
 def test_session_id() -> str:
     """Provide a test session ID."""
     return "test-session-12345"
 
 
 @pytest.fixture
-def mock_uuid(test_session_id: str):
+def mock_uuid(monkeypatch, test_session_id: str):
     """Mock UUID generation for consistent session IDs."""
-    with patch("app.routers.sessions.uuid.uuid4") as mock_uuid4:
-        mock_uuid4.return_value = Mock()
-        mock_uuid4.return_value.__str__ = Mock(return_value=test_session_id)
-        yield mock_uuid4
+    # The router only calls str() on the result, so the ID string itself will do
+    monkeypatch.setattr(sessions.uuid, "uuid4", lambda: test_session_id)
 
 
 # Error response fixtures
@@ -179,9 +221,9 @@ def invalid_query_payload() -> Dict[str, Any]:
     return {"invalid_field": "test"}
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def session_headers(
-    auth_headers: Dict[str, str], test_session_id: str
-) -> Dict[str, str]:
-    """Provide headers with session ID for query endpoint."""
-    return {**auth_headers, "X-Session-ID": test_session_id}
+    auth_headers: Mapping[str, str], test_session_id: str
+) -> Mapping[str, str]:
+    """Provide headers with session ID for query endpoint, read-only and shared."""
+    return MappingProxyType({**auth_headers, "X-Session-ID": test_session_id})
@@ -18,51 +18,69 @@ def run_command(cmd, description=""):
         print(f"\n🔄 {description}")
         print("=" * 50)
     print(f"Running: {' '.join(cmd)}")
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    if result.stdout:
-        print(result.stdout)
-    if result.stderr:
-        print(result.stderr, file=sys.stderr)
+    # Output streams straight to the terminal as the command produces it
+    sys.stdout.flush()
+    result = subprocess.run(cmd)
 
     return result.returncode == 0
 
 
-def run_tests(test_type="all", verbose=False, coverage=True, html_report=True):
+def run_pytest(args, description=""):
+    """Run pytest in this interpreter and return whether it passed."""
+    # Imported here so --install can run before pytest is available
+    import pytest
+
+    if description:
+        print(f"\n🔄 {description}")
+        print("=" * 50)
+    print(f"Running: pytest {' '.join(args)}")
+    return pytest.main(args) == 0
+
+
+def run_tests(
+    test_type="all", verbose=False, coverage=False, html_report=True, parallel=True
+):
     """Run tests with specified options."""
     # Ensure we're in the right directory
     project_root = Path(__file__).parent.parent
     os.chdir(project_root)
 
-    # Base pytest command
-    cmd = ["python", "-m", "pytest"]
+    # pytest arguments
+    args = []
 
     # Add verbosity
     if verbose:
-        cmd.append("-v")
+        args.append("-v")
     else:
-        cmd.append("-q")
+        args.append("-q")
+
+    # Spread tests over one worker per CPU (pytest-xdist); loadfile keeps each
+    # file on a single worker so session-scoped fixtures are reused within it.
+    # pytest-cov combines coverage from the workers on its own
+    if parallel:
+        args.extend(["-n", "auto", "--dist=loadfile"])
 
     # Add coverage options
     if coverage:
-        cmd.extend(["--cov=app", "--cov-report=term-missing"])
+        args.extend(["--cov=app", "--cov-report=term-missing"])
         if html_report:
-            cmd.append("--cov-report=html")
+            args.append("--cov-report=html")
 
     # Select test files based on type
     if test_type == "health":
-        cmd.append("tests/test_health_endpoint.py")
+        args.append("tests/test_health_endpoint.py")
     elif test_type == "sessions":
-        cmd.append("tests/test_session_endpoints.py")
+        args.append("tests/test_session_endpoints.py")
     elif test_type == "query":
-        cmd.append("tests/test_query_endpoint.py")
+        args.append("tests/test_query_endpoint.py")
     elif test_type == "auth":
-        cmd.append("tests/test_authentication.py")
+        args.append("tests/test_authentication.py")
     elif test_type == "errors":
-        cmd.append("tests/test_error_handling.py")
+        args.append("tests/test_error_handling.py")
     elif test_type == "integration":
-        cmd.append("tests/test_integration.py")
+        args.append("tests/test_integration.py")
     elif test_type == "unit":
-        cmd.extend(
+        args.extend(
             [
                 "tests/test_health_endpoint.py",
                 "tests/test_session_endpoints.py",
@@ -72,13 +90,13 @@ def run_tests(test_type="all", verbose=False, coverage=True, html_report=True):
             ]
         )
     elif test_type == "all":
-        cmd.append("tests/")
+        args.append("tests/")
     else:
         print(f"❌ Unknown test type: {test_type}")
         return False
 
     # Run the tests
-    success = run_command(cmd, f"Running {test_type} tests")
+    success = run_pytest(args, f"Running {test_type} tests")
 
     if success:
         print(f"\n✅ {test_type.title()} tests passed!")
@@ -142,13 +160,21 @@ def main():
     )
 
     parser.add_argument(
-        "--no-coverage", action="store_true", help="Skip coverage reporting"
+        "--coverage",
+        action="store_true",
+        help="Measure coverage (off by default; tracing slows the run)",
     )
 
     parser.add_argument(
         "--no-html", action="store_true", help="Skip HTML coverage report"
     )
 
+    parser.add_argument(
+        "--no-parallel",
+        action="store_true",
+        help="Run tests in a single process instead of across all CPUs",
+    )
+
     parser.add_argument(
         "--install",
         action="store_true",
@@ -160,7 +186,9 @@ def main():
     )
 
     parser.add_argument(
-        "--quick", action="store_true", help="Quick run: no coverage, no HTML reports"
+        "--quick",
+        action="store_true",
+        help="Quick run: no coverage, no HTML reports, even with --coverage",
     )
 
     args = parser.parse_args()
@@ -185,7 +213,7 @@ def main():
         coverage = False
         html_report = False
     else:
-        coverage = not args.no_coverage
+        coverage = args.coverage
         html_report = not args.no_html
 
     # Run tests
@@ -194,6 +222,7 @@ def main():
         verbose=args.verbose,
         coverage=coverage,
         html_report=html_report,
+        parallel=not args.no_parallel,
     )
 
     if success:
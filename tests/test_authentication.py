@@ -5,29 +5,37 @@ This module tests authentication behavior across all endpoints
 to ensure proper security controls are in place.
 """
 
+import asyncio
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import patch
-import os
+from httpx import AsyncClient
+
+# Every authenticated endpoint, with the extra headers it needs
+ENDPOINTS = [
+    ("/api/health", "GET", {}),
+    ("/api/sessions", "POST", {}),
+    ("/api/sessions/test-session", "GET", {}),
+    ("/api/sessions/test-session", "DELETE", {}),
+    ("/api/query", "POST", {"X-Session-ID": "test-session"}),
+]
+
+# Headers carrying a 10KB API key, built once for the module
+LONG_KEY_HEADERS = {
+    "Authorization": "Bearer " + "a" * 10000,
+    "Content-Type": "application/json",
+}
 
 
 class TestAuthentication:
     """Test cases for API key authentication across all endpoints."""
 
-    @pytest.mark.parametrize(
-        "endpoint,method,extra_headers",
-        [
-            ("/api/health", "GET", {}),
-            ("/api/sessions", "POST", {}),
-            ("/api/sessions/test-session", "GET", {}),
-            ("/api/sessions/test-session", "DELETE", {}),
-            ("/api/query", "POST", {"X-Session-ID": "test-session"}),
-        ],
-    )
-    def test_valid_api_key_all_endpoints(
+    @pytest.mark.parametrize("scenario", ["valid", "invalid", "missing"])
+    @pytest.mark.parametrize("endpoint,method,extra_headers", ENDPOINTS)
+    def test_api_key_all_endpoints(
         self,
         client: TestClient,
         auth_headers,
+        scenario,
         endpoint,
         method,
         extra_headers,
@@ -35,67 +43,17 @@ class TestAuthentication:
         mock_baml_client,
         mock_uuid,
     ):
-        """Test that valid API key works for all endpoints."""
-        headers = {**auth_headers, **extra_headers}
-
-        if method == "GET":
-            response = client.get(endpoint, headers=headers)
-        elif method == "POST":
-            json_data = {"message": "test"} if endpoint == "/api/query" else {}
-            response = client.post(endpoint, headers=headers, json=json_data)
-        elif method == "DELETE":
-            response = client.delete(endpoint, headers=headers)
-
-        # Should not get authentication errors
-        assert response.status_code != 403
-        assert response.status_code != 401
-
-    @pytest.mark.parametrize(
-        "endpoint,method,extra_headers",
-        [
-            ("/api/health", "GET", {}),
-            ("/api/sessions", "POST", {}),
-            ("/api/sessions/test-session", "GET", {}),
-            ("/api/sessions/test-session", "DELETE", {}),
-            ("/api/query", "POST", {"X-Session-ID": "test-session"}),
-        ],
-    )
-    def test_invalid_api_key_all_endpoints(
-        self, client: TestClient, endpoint, method, extra_headers
-    ):
-        """Test that invalid API key is rejected for all endpoints."""
-        headers = {
-            "Authorization": "Bearer invalid-api-key",
-            "Content-Type": "application/json",
-            **extra_headers,
-        }
-
-        if method == "GET":
-            response = client.get(endpoint, headers=headers)
-        elif method == "POST":
-            json_data = {"message": "test"} if endpoint == "/api/query" else {}
-            response = client.post(endpoint, headers=headers, json=json_data)
-        elif method == "DELETE":
-            response = client.delete(endpoint, headers=headers)
-
-        assert response.status_code == 403
-        assert response.json() == {"detail": "Invalid API key"}
-
-    @pytest.mark.parametrize(
-        "endpoint,method,extra_headers",
-        [
-            ("/api/health", "GET", {}),
-            ("/api/sessions", "POST", {}),
-            ("/api/sessions/test-session", "GET", {}),
-            ("/api/sessions/test-session", "DELETE", {}),
-            ("/api/query", "POST", {"X-Session-ID": "test-session"}),
-        ],
-    )
-    def test_missing_authorization_header_all_endpoints(
-        self, client: TestClient, endpoint, method, extra_headers
-    ):
-        """Test that missing Authorization header is rejected for all endpoints."""
-        headers = {"Content-Type": "application/json", **extra_headers}
+        """Test valid, invalid and missing API keys against every endpoint."""
+        if scenario == "valid":
+            headers = {**auth_headers, **extra_headers}
+        elif scenario == "invalid":
+            headers = {
+                "Authorization": "Bearer invalid-api-key",
+                "Content-Type": "application/json",
+                **extra_headers,
+            }
+        else:
+            headers = {"Content-Type": "application/json", **extra_headers}
 
         if method == "GET":
             response = client.get(endpoint, headers=headers)
@@ -105,7 +63,15 @@ class TestAuthentication:
         elif method == "DELETE":
             response = client.delete(endpoint, headers=headers)
 
-        assert response.status_code == 403
+        if scenario == "valid":
+            # Should not get authentication errors
+            assert response.status_code != 403
+            assert response.status_code != 401
+        elif scenario == "invalid":
+            assert response.status_code == 403
+            assert response.json() == {"detail": "Invalid API key"}
+        else:
+            assert response.status_code == 403
 
     @pytest.mark.parametrize(
         "auth_header_value",
@@ -118,6 +84,15 @@ class TestAuthentication:
             "bearer test-api-key",  # Wrong case
             "BEARER test-api-key",  # Wrong case
         ],
+        ids=[
+            "empty",
+            "bearer_only",
+            "bearer_space",
+            "wrong_scheme",
+            "no_scheme",
+            "lowercase_scheme",
+            "uppercase_scheme",
+        ],
     )
     def test_malformed_authorization_headers(
         self, client: TestClient, auth_header_value
@@ -131,44 +106,47 @@ class TestAuthentication:
         response = client.get("/api/health", headers=headers)
         assert response.status_code == 403
 
-    def test_api_key_case_sensitivity(self, client: TestClient, test_api_key):
+    @pytest.mark.parametrize(
+        "transform", [str.upper, str.lower, str.capitalize, str.swapcase]
+    )
+    def test_api_key_case_sensitivity(
+        self, client: TestClient, test_api_key, transform
+    ):
         """Test that API key is case sensitive."""
-        # Test with different case variations
-        case_variations = [
-            test_api_key.upper(),
-            test_api_key.lower(),
-            test_api_key.capitalize(),
-            test_api_key.swapcase(),
-        ]
+        variant = transform(test_api_key)
+        if variant == test_api_key:
+            pytest.skip("Case variation matches the configured key")
 
-        for variant in case_variations:
-            if variant != test_api_key:  # Skip the correct one
-                headers = {
-                    "Authorization": f"Bearer {variant}",
-                    "Content-Type": "application/json",
-                }
+        headers = {
+            "Authorization": f"Bearer {variant}",
+            "Content-Type": "application/json",
+        }
 
-                response = client.get("/api/health", headers=headers)
-                assert response.status_code == 403
+        response = client.get("/api/health", headers=headers)
+        assert response.status_code == 403
 
-    def test_api_key_with_extra_whitespace(self, client: TestClient, test_api_key):
+    @pytest.mark.parametrize(
+        "template",
+        [
+            " {}",  # Leading space
+            "{} ",  # Trailing space
+            " {} ",  # Both
+            "{}\t",  # Tab
+            "{}\n",  # Newline
+        ],
+        ids=["leading_space", "trailing_space", "both_spaces", "tab", "newline"],
+    )
+    def test_api_key_with_extra_whitespace(
+        self, client: TestClient, test_api_key, template
+    ):
         """Test API key with extra whitespace."""
-        whitespace_variations = [
-            f" {test_api_key}",  # Leading space
-            f"{test_api_key} ",  # Trailing space
-            f" {test_api_key} ",  # Both
-            f"{test_api_key}\t",  # Tab
-            f"{test_api_key}\n",  # Newline
-        ]
-
-        for variant in whitespace_variations:
-            headers = {
-                "Authorization": f"Bearer {variant}",
-                "Content-Type": "application/json",
-            }
+        headers = {
+            "Authorization": f"Bearer {template.format(test_api_key)}",
+            "Content-Type": "application/json",
+        }
 
-            response = client.get("/api/health", headers=headers)
-            assert response.status_code == 403
+        response = client.get("/api/health", headers=headers)
+        assert response.status_code == 403
 
     def test_multiple_authorization_headers(self, client: TestClient, test_api_key):
         """Test behavior with multiple Authorization headers."""
@@ -187,49 +165,39 @@ class TestAuthentication:
         assert response.status_code in [200, 403]
 
     def test_api_key_environment_variable_missing(
-        self, client: TestClient, auth_headers
+        self, client: TestClient, auth_headers, monkeypatch
     ):
         """Test behavior when PP_API_KEY environment variable is not set."""
-        with patch.dict(os.environ, {}, clear=True):
-            # Create a new client without the mocked env vars
-            from app.main import app
+        # The key is read on every request, so the shared client sees the change
+        monkeypatch.delenv("PP_API_KEY", raising=False)
 
-            temp_client = TestClient(app)
+        response = client.get("/api/health", headers=auth_headers)
 
-            response = temp_client.get("/api/health", headers=auth_headers)
+        assert response.status_code == 500
+        assert response.json() == {"detail": "PP_API_KEY not configured"}
 
-            assert response.status_code == 500
-            assert response.json() == {"detail": "PP_API_KEY not configured"}
-
-    def test_api_key_environment_variable_empty(self, client: TestClient, auth_headers):
+    def test_api_key_environment_variable_empty(
+        self, client: TestClient, auth_headers, monkeypatch
+    ):
         """Test behavior when PP_API_KEY environment variable is empty."""
-        with patch.dict(os.environ, {"PP_API_KEY": ""}, clear=True):
-            from app.main import app
+        monkeypatch.setenv("PP_API_KEY", "")
 
-            temp_client = TestClient(app)
+        response = client.get("/api/health", headers=auth_headers)
 
-            response = temp_client.get("/api/health", headers=auth_headers)
-
-            # Empty API key should be treated as not configured
-            assert response.status_code in [403, 500]
+        # Empty API key should be treated as not configured
+        assert response.status_code in [403, 500]
 
     def test_very_long_api_key(self, client: TestClient):
         """Test behavior with very long API key."""
-        very_long_key = "a" * 10000  # 10KB key
-        headers = {
-            "Authorization": f"Bearer {very_long_key}",
-            "Content-Type": "application/json",
-        }
-
-        response = client.get("/api/health", headers=headers)
+        response = client.get("/api/health", headers=LONG_KEY_HEADERS)
 
         # Should reject gracefully, not cause server errors
         assert response.status_code == 403
         assert "detail" in response.json()
 
-    def test_api_key_with_special_characters(self, client: TestClient):
-        """Test API key containing special characters."""
-        special_keys = [
+    @pytest.mark.parametrize(
+        "special_key",
+        [
             "key-with-dashes",
             "key_with_underscores",
             "key.with.dots",
@@ -238,57 +206,39 @@ class TestAuthentication:
             "key@with@at",
             "key#with#hash",
             "key%20with%20encoding",
-        ]
-
-        for special_key in special_keys:
-            headers = {
-                "Authorization": f"Bearer {special_key}",
-                "Content-Type": "application/json",
-            }
+        ],
+    )
+    def test_api_key_with_special_characters(self, client: TestClient, special_key):
+        """Test API key containing special characters."""
+        headers = {
+            "Authorization": f"Bearer {special_key}",
+            "Content-Type": "application/json",
+        }
 
-            response = client.get("/api/health", headers=headers)
-            # All should be rejected since they're not the configured test key
-            assert response.status_code == 403
+        response = client.get("/api/health", headers=headers)
+        # All should be rejected since they're not the configured test key
+        assert response.status_code == 403
 
-    def test_concurrent_authentication_requests(
-        self, client: TestClient, auth_headers, mock_session_store
+    async def test_concurrent_authentication_requests(
+        self, async_client: AsyncClient, auth_headers, mock_session_store
     ):
         """Test concurrent requests with same API key."""
-        import concurrent.futures
-
-        def make_authenticated_request():
-            return client.get("/api/health", headers=auth_headers)
-
         # Make 10 concurrent authenticated requests
-        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-            futures = [executor.submit(make_authenticated_request) for _ in range(10)]
-            responses = [
-                future.result() for future in concurrent.futures.as_completed(futures)
-            ]
+        responses = await asyncio.gather(
+            *(async_client.get("/api/health", headers=auth_headers) for _ in range(10))
+        )
 
         # All should succeed
         for response in responses:
             assert response.status_code == 200
 
     def test_authentication_performance(
-        self, client: TestClient, auth_headers, mock_session_store
+        self, benchmark, client: TestClient, auth_headers, mock_session_store
     ):
-        """Test that authentication doesn't significantly impact response time."""
-        import time
+        """Benchmark an authenticated request; timings are reported, not asserted."""
+        response = benchmark(client.get, "/api/health", headers=auth_headers)
 
-        # Make multiple requests and measure time
-        times = []
-        for _ in range(5):
-            start_time = time.time()
-            response = client.get("/api/health", headers=auth_headers)
-            end_time = time.time()
-
-            assert response.status_code == 200
-            times.append(end_time - start_time)
-
-        # Authentication should be fast (under 100ms for health check)
-        avg_time = sum(times) / len(times)
-        assert avg_time < 0.1  # 100ms
+        assert response.status_code == 200
 
     def test_bearer_token_extraction(
         self, client: TestClient, test_api_key, mock_session_store
@@ -326,21 +276,27 @@ class TestAuthentication:
             if expected_response:
                 assert response.json() == expected_response
 
-    def test_auth_header_injection_protection(self, client: TestClient, test_api_key):
+    @pytest.mark.parametrize(
+        "injection",
+        [
+            "\r\nX-Injected: malicious",
+            "\nX-Injected: malicious",
+            "; X-Injected: malicious",
+        ],
+        ids=["crlf", "lf", "semicolon"],
+    )
+    def test_auth_header_injection_protection(
+        self, client: TestClient, test_api_key, injection
+    ):
         """Test protection against header injection attacks."""
-        malicious_headers = [
-            f"Bearer {test_api_key}\r\nX-Injected: malicious",
-            f"Bearer {test_api_key}\nX-Injected: malicious",
-            f"Bearer {test_api_key}; X-Injected: malicious",
-        ]
-
-        for malicious_header in malicious_headers:
-            headers = {
-                "Authorization": malicious_header,
-                "Content-Type": "application/json",
-            }
+        # The in-process transport passes raw header values through untouched,
+        # so the server itself must reject them
+        headers = {
+            "Authorization": f"Bearer {test_api_key}{injection}",
+            "Content-Type": "application/json",
+        }
 
-            response = client.get("/api/health", headers=headers)
+        response = client.get("/api/health", headers=headers)
 
-            # Should reject malicious headers
-            assert response.status_code == 403
+        # Should reject malicious headers
+        assert response.status_code == 403
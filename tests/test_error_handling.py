@@ -7,8 +7,59 @@ to ensure the API behaves gracefully under various failure conditions.
 
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import Mock, patch, AsyncMock
+from httpx import AsyncClient
+from unittest.mock import Mock, AsyncMock
 import asyncio
+import orjson
+from baml_client.types import AnalyticsQuestion, AnalyticsCategory
+
+# Messages mixing scripts, emoji, whitespace and symbols
+SPECIAL_MESSAGES = [
+    "Hello 🤖🎉👋",  # Emojis
+    "Text with ñ, é, ü, ç characters",  # Accented characters
+    "中文测试",  # Chinese characters
+    "العربية",  # Arabic
+    "Русский",  # Russian
+    "🔥💯✨🚀",  # Only emojis
+    "Mixed: Hello 世界 🌍",  # Mixed languages and emojis
+    "\n\t\r special whitespace",  # Special whitespace
+    "\"quotes\" and 'apostrophes'",  # Quotes
+    "Symbols: @#$%^&*()+=[]{}|\\:;\"'<>?,./",  # Special symbols
+]
+
+# Query bodies for SPECIAL_MESSAGES, encoded once as UTF-8 JSON
+SPECIAL_MESSAGE_BODIES = [orjson.dumps({"message": m}) for m in SPECIAL_MESSAGES]
+
+# Malformed or unusual query headers; {api_key} and {session_id} are filled
+# from fixtures. None values can't be sent as headers, so they are dropped here
+_MALFORMED_HEADERS = [
+    # Missing required headers
+    {"Authorization": "Bearer {api_key}"},  # Missing session ID for query
+    {"X-Session-ID": "{session_id}"},  # Missing auth for query
+    # Malformed values
+    {"Authorization": "Bearer {api_key}", "X-Session-ID": ""},
+    {"Authorization": "Bearer {api_key}", "X-Session-ID": None},
+    # Extra headers that might confuse parsing
+    {
+        "Authorization": "Bearer {api_key}",
+        "X-Session-ID": "{session_id}",
+        "X-Forwarded-For": "malicious-ip",
+        "User-Agent": "'; DROP TABLE sessions; --",
+    },
+]
+MALFORMED_HEADER_CASES = tuple(
+    {
+        **{k: v for k, v in h.items() if v is not None},
+        "Content-Type": "application/json",
+    }
+    for h in _MALFORMED_HEADERS
+)
+
+# Analytics routing result returned by the mocked Chat call; shared by every
+# test because the router only reads its category and never mutates it
+_ANALYTICS_Q = AnalyticsQuestion(
+    category=AnalyticsCategory.USERS, question="Test question"
+)
 
 
 class TestErrorHandling:
@@ -16,8 +67,7 @@ class TestErrorHandling:
 
     def test_invalid_json_content_type(self, client: TestClient, session_headers):
         """Test sending JSON data with wrong content type."""
-        headers = {**session_headers}
-        headers["Content-Type"] = "text/plain"
+        headers = session_headers | {"Content-Type": "text/plain"}
 
         response = client.post("/api/query", headers=headers, json={"message": "test"})
 
@@ -34,169 +84,183 @@ class TestErrorHandling:
         )
         assert response.status_code == 422
 
-    def test_extremely_large_payload(self, client: TestClient, session_headers):
+    @pytest.mark.parametrize(
+        "size",
+        [16 * 1024, pytest.param(1024 * 1024, marks=pytest.mark.slow)],
+        ids=["16KiB", "1MiB"],
+    )
+    async def test_extremely_large_payload(
+        self, async_client: AsyncClient, session_headers, size
+    ):
         """Test endpoints with extremely large payloads."""
-        # Create a very large message (1MB)
-        large_message = "x" * (1024 * 1024)
+        # The 1MiB message only runs with --run-slow
+        large_message = "x" * size
         payload = {"message": large_message}
 
-        response = client.post("/api/query", headers=session_headers, json=payload)
+        response = await async_client.post(
+            "/api/query", headers=session_headers, json=payload
+        )
 
         # Should handle gracefully - either accept or reject with proper error
         assert response.status_code in [200, 413, 422]
 
+    @pytest.mark.parametrize(
+        "body",
+        SPECIAL_MESSAGE_BODIES,
+        ids=[
+            "emoji",
+            "accented",
+            "chinese",
+            "arabic",
+            "russian",
+            "emoji_only",
+            "mixed",
+            "whitespace",
+            "quotes",
+            "symbols",
+        ],
+    )
     def test_unicode_and_special_characters(
-        self, client: TestClient, session_headers, mock_session_store, mock_baml_client
+        self,
+        client: TestClient,
+        session_headers,
+        mock_session_store,
+        mock_baml_client,
+        empty_state,
+        body,
     ):
         """Test handling of various Unicode and special characters."""
-        special_messages = [
-            "Hello 🤖🎉👋",  # Emojis
-            "Text with ñ, é, ü, ç characters",  # Accented characters
-            "中文测试",  # Chinese characters
-            "العربية",  # Arabic
-            "Русский",  # Russian
-            "🔥💯✨🚀",  # Only emojis
-            "Mixed: Hello 世界 🌍",  # Mixed languages and emojis
-            "\n\t\r special whitespace",  # Special whitespace
-            "\"quotes\" and 'apostrophes'",  # Quotes
-            "Symbols: @#$%^&*()+=[]{}|\\:;\"'<>?,./",  # Special symbols
-        ]
-
         # Configure mocks
-        mock_state = Mock()
-        mock_state.recent_messages = []
-        mock_session_store.get_state.return_value = mock_state
+        mock_session_store.get_state.return_value = empty_state
         mock_baml_client.Chat = AsyncMock(return_value=Mock(content="Response"))
 
-        for message in special_messages:
-            payload = {"message": message}
-            response = client.post("/api/query", headers=session_headers, json=payload)
+        response = client.post("/api/query", headers=session_headers, content=body)
 
-            # Should handle all Unicode gracefully
-            assert response.status_code == 200
+        # Should handle all Unicode gracefully
+        assert response.status_code == 200
 
-    def test_null_and_empty_values(self, client: TestClient, session_headers):
-        """Test handling of null and empty values in requests."""
-        test_payloads = [
+    @pytest.mark.parametrize(
+        "payload",
+        [
             {"message": None},  # Null message
             {"message": ""},  # Empty string
             {},  # Missing message field
             {"message": 0},  # Wrong type (number)
             {"message": []},  # Wrong type (array)
             {"message": {}},  # Wrong type (object)
-        ]
-
-        for payload in test_payloads:
-            response = client.post("/api/query", headers=session_headers, json=payload)
+        ],
+        ids=["null", "empty", "missing", "number", "array", "object"],
+    )
+    def test_null_and_empty_values(self, client: TestClient, session_headers, payload):
+        """Test handling of null and empty values in requests."""
+        response = client.post("/api/query", headers=session_headers, json=payload)
 
-            # Should reject invalid payloads properly
-            assert response.status_code in [200, 400, 422]
+        # Should reject invalid payloads properly
+        assert response.status_code in [200, 400, 422]
 
-            if response.status_code == 422:
-                # Should have validation error details
-                error_data = response.json()
-                assert "detail" in error_data
+        if response.status_code == 422:
+            # Should have validation error details
+            error_data = response.json()
+            assert "detail" in error_data
 
+    @pytest.mark.parametrize(
+        "method,store_attr,url",
+        [
+            ("POST", "get_state", "/api/sessions"),
+            ("GET", "get_state", "/api/sessions/{session_id}"),
+            ("DELETE", "delete_session", "/api/sessions/{session_id}"),
+        ],
+        ids=["create", "get", "delete"],
+    )
     def test_session_store_exceptions(
-        self, client: TestClient, auth_headers, test_session_id
+        self,
+        client: TestClient,
+        auth_headers,
+        test_session_id,
+        mock_session_store,
+        mock_uuid,
+        method,
+        store_attr,
+        url,
     ):
         """Test handling when session store raises exceptions."""
-        # Test session creation with store exception
-        with (
-            patch("app.routers.sessions.session_store") as mock_store,
-            patch("app.routers.sessions.uuid.uuid4"),
-        ):
-            mock_store.get_state.side_effect = Exception("Session store error")
-
-            # FastAPI will let unhandled exceptions bubble up, causing a test failure
-            # This is expected behavior - the application should handle this gracefully in production
-            with pytest.raises(Exception, match="Session store error"):
-                client.post("/api/sessions", headers=auth_headers)
-
-        # Test session retrieval with store exception
-        with patch("app.routers.sessions.session_store") as mock_store:
-            mock_store.get_state.side_effect = Exception("Session store error")
-
-            # FastAPI will let unhandled exceptions bubble up
-            with pytest.raises(Exception, match="Session store error"):
-                client.get(f"/api/sessions/{test_session_id}", headers=auth_headers)
-
-        # Test session deletion with store exception
-        with patch("app.routers.sessions.session_store") as mock_store:
-            mock_store.delete_session.side_effect = Exception("Session store error")
-
-            # FastAPI will let unhandled exceptions bubble up
-            with pytest.raises(Exception, match="Session store error"):
-                client.delete(f"/api/sessions/{test_session_id}", headers=auth_headers)
+        getattr(mock_session_store, store_attr).side_effect = Exception(
+            "Session store error"
+        )
 
-    def test_baml_client_various_exceptions(
-        self, client: TestClient, session_headers, mock_session_store
-    ):
-        """Test handling of various BAML client exceptions."""
-        mock_state = Mock()
-        mock_state.recent_messages = []
-        mock_session_store.get_state.return_value = mock_state
+        # FastAPI will let unhandled exceptions bubble up, causing a test failure
+        # This is expected behavior - the application should handle this gracefully in production
+        with pytest.raises(Exception, match="Session store error"):
+            client.request(
+                method, url.format(session_id=test_session_id), headers=auth_headers
+            )
 
-        exception_types = [
+    @pytest.mark.parametrize(
+        "exception",
+        [
             Exception("Generic error"),
             ConnectionError("Network error"),
             TimeoutError("Request timeout"),
             ValueError("Invalid value"),
             RuntimeError("Runtime error"),
             KeyError("Missing key"),
-        ]
-
-        for exception in exception_types:
-            with patch("app.routers.queries.b") as mock_baml:
-                mock_baml.Chat = AsyncMock(side_effect=exception)
+        ],
+        ids=lambda exception: type(exception).__name__,
+    )
+    def test_baml_client_various_exceptions(
+        self,
+        client: TestClient,
+        session_headers,
+        mock_session_store,
+        mock_baml_client,
+        empty_state,
+        exception,
+    ):
+        """Test handling of various BAML client exceptions."""
+        mock_session_store.get_state.return_value = empty_state
+        mock_baml_client.Chat = AsyncMock(side_effect=exception)
 
-                response = client.post(
-                    "/api/query", headers=session_headers, json={"message": "test"}
-                )
+        response = client.post(
+            "/api/query", headers=session_headers, json={"message": "test"}
+        )
 
-                # Should handle all exceptions gracefully
-                assert response.status_code == 200
-                data = response.json()
-                assert "having trouble processing your request" in data["response"]
+        # Should handle all exceptions gracefully
+        assert response.status_code == 200
+        data = response.json()
+        assert "having trouble processing your request" in data["response"]
 
     def test_analytics_loader_exceptions(
-        self, client: TestClient, session_headers, mock_session_store, mock_baml_client
+        self,
+        client: TestClient,
+        session_headers,
+        mock_session_store,
+        mock_baml_client,
+        mock_analytics_loader,
+        empty_state,
     ):
         """Test handling when analytics loader raises exceptions."""
         # Configure mocks
-        mock_state = Mock()
-        mock_state.recent_messages = []
-        mock_session_store.get_state.return_value = mock_state
+        mock_session_store.get_state.return_value = empty_state
 
         # Mock BAML to return analytics question
-        from baml_client.types import AnalyticsQuestion, AnalyticsCategory
-
-        analytics_question = AnalyticsQuestion(
-            category=AnalyticsCategory.USERS, question="Test question"
-        )
-        mock_baml_client.Chat = AsyncMock(return_value=analytics_question)
+        mock_baml_client.Chat = AsyncMock(return_value=_ANALYTICS_Q)
 
         # Mock analytics loader to raise exception
-        with patch("app.routers.queries.get_analytics_data_for_category") as mock_loader:
-            mock_loader.side_effect = Exception("Analytics error")
-
-            response = client.post(
-                "/api/query", headers=session_headers, json={"message": "test"}
-            )
+        mock_analytics_loader.side_effect = Exception("Analytics error")
 
-            # Should handle analytics errors gracefully
-            assert response.status_code == 200
-            data = response.json()
-            assert "having trouble processing your request" in data["response"]
+        response = client.post(
+            "/api/query", headers=session_headers, json={"message": "test"}
+        )
 
-    def test_invalid_session_ids(
-        self, client: TestClient, auth_headers, mock_session_store, sample_state
-    ):
-        """Test handling of invalid session IDs."""
-        # Use proper State object from fixture
-        mock_session_store.get_state.return_value = sample_state
+        # Should handle analytics errors gracefully
+        assert response.status_code == 200
+        data = response.json()
+        assert "having trouble processing your request" in data["response"]
 
-        invalid_session_ids = [
+    @pytest.mark.parametrize("method", ["GET", "DELETE"])
+    @pytest.mark.parametrize(
+        "session_id",
+        [
             "",  # Empty
             " ",  # Whitespace only
             "../../etc/passwd",  # Path traversal attempt
@@ -206,186 +270,200 @@ class TestErrorHandling:
             "session?with=query",  # Query parameters
             "session#with-fragment",  # Fragment
             "extremely-long-session-id-" + "x" * 1000,  # Very long
-        ]
-
-        for session_id in invalid_session_ids:
-            # Test GET session
-            response = client.get(f"/api/sessions/{session_id}", headers=auth_headers)
-            # Should handle gracefully - either work or return proper error
-            # 405 can occur for malformed URLs that don't match route patterns
-            assert response.status_code in [200, 400, 404, 405, 422]
-
-            # Test DELETE session
-            response = client.delete(
-                f"/api/sessions/{session_id}", headers=auth_headers
-            )
-            # Should handle gracefully - 405 can also occur for malformed URLs
-            assert response.status_code in [200, 400, 404, 405, 422]
+        ],
+        ids=[
+            "empty",
+            "whitespace",
+            "path_traversal",
+            "xss",
+            "spaces",
+            "slashes",
+            "query",
+            "fragment",
+            "very_long",
+        ],
+    )
+    def test_invalid_session_ids(
+        self,
+        client: TestClient,
+        auth_headers,
+        mock_session_store,
+        sample_state,
+        session_id,
+        method,
+    ):
+        """Test handling of invalid session IDs."""
+        # Use proper State object from fixture
+        mock_session_store.get_state.return_value = sample_state
 
-    def test_concurrent_request_handling(
-        self, client: TestClient, session_headers, mock_session_store, mock_baml_client
+        response = client.request(
+            method, f"/api/sessions/{session_id}", headers=auth_headers
+        )
+        # Should handle gracefully - either work or return proper error
+        # 405 can occur for malformed URLs that don't match route patterns
+        assert response.status_code in [200, 400, 404, 405, 422]
+
+    async def test_concurrent_request_handling(
+        self,
+        async_client: AsyncClient,
+        session_headers,
+        mock_session_store,
+        mock_baml_client,
+        empty_state,
     ):
         """Test handling of concurrent requests that might cause race conditions."""
-        import concurrent.futures
-
         # Configure mocks
-        mock_state = Mock()
-        mock_state.recent_messages = []
-        mock_session_store.get_state.return_value = mock_state
+        mock_session_store.get_state.return_value = empty_state
 
-        # Mock BAML with delay to increase chance of race conditions
+        # Yield to the event loop once so concurrent requests interleave
         async def delayed_response(*args, **kwargs):
-            await asyncio.sleep(0.1)  # 100ms delay
+            await asyncio.sleep(0)
             return Mock(content="Delayed response")
 
         mock_baml_client.Chat = AsyncMock(side_effect=delayed_response)
 
-        def make_request(request_id):
-            return client.post(
-                "/api/query",
-                headers=session_headers,
-                json={"message": f"Concurrent request {request_id}"},
+        # Make 5 concurrent requests on one event loop
+        responses = await asyncio.gather(
+            *(
+                async_client.post(
+                    "/api/query",
+                    headers=session_headers,
+                    json={"message": f"Concurrent request {request_id}"},
+                )
+                for request_id in range(5)
             )
-
-        # Make 5 concurrent requests
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            futures = [executor.submit(make_request, i) for i in range(5)]
-            responses = [
-                future.result() for future in concurrent.futures.as_completed(futures)
-            ]
+        )
 
         # All should complete successfully without errors
         for response in responses:
             assert response.status_code == 200
 
+    @pytest.mark.parametrize(
+        "session_count",
+        [10, pytest.param(100, marks=pytest.mark.slow)],
+    )
     def test_memory_and_resource_limits(
-        self, client: TestClient, auth_headers, sample_state
+        self,
+        client: TestClient,
+        auth_headers,
+        mock_session_store,
+        mock_uuid,
+        session_count,
     ):
         """Test behavior under memory/resource constraints."""
-        # Test creating many sessions rapidly
+        # Test creating many sessions rapidly; the 100-session run needs --run-slow
         session_ids = []
 
-        with (
-            patch("app.routers.sessions.session_store") as mock_store,
-            patch("app.routers.sessions.uuid.uuid4"),
-        ):
-            mock_store.get_state.return_value = sample_state
-
-            # Create 100 sessions rapidly
-            for i in range(100):
-                response = client.post("/api/sessions", headers=auth_headers)
+        for i in range(session_count):
+            response = client.post("/api/sessions", headers=auth_headers)
 
-                # Should handle resource pressure gracefully
-                assert response.status_code in [
-                    201,
-                    429,
-                    500,
-                    503,
-                ]  # Created, rate limited, or server error
+            # Should handle resource pressure gracefully
+            assert response.status_code in [
+                201,
+                429,
+                500,
+                503,
+            ]  # Created, rate limited, or server error
 
-                if response.status_code == 201:
-                    session_data = response.json()
-                    session_ids.append(session_data["session_id"])
+            if response.status_code == 201:
+                session_data = response.json()
+                session_ids.append(session_data["session_id"])
 
         # Should create at least some sessions
         assert len(session_ids) > 0
 
+    @pytest.mark.parametrize(
+        "headers",
+        MALFORMED_HEADER_CASES,
+        ids=["no_session", "no_auth", "empty_session", "none_session", "extra_headers"],
+    )
     def test_malformed_request_headers(
-        self, client: TestClient, test_api_key, test_session_id
+        self, client: TestClient, test_api_key, test_session_id, headers
     ):
         """Test handling of malformed or unusual request headers."""
-        malformed_headers = [
-            # Missing required headers
-            {"Authorization": f"Bearer {test_api_key}"},  # Missing session ID for query
-            {"X-Session-ID": test_session_id},  # Missing auth for query
-            # Malformed values
-            {"Authorization": f"Bearer {test_api_key}", "X-Session-ID": ""},
-            {"Authorization": f"Bearer {test_api_key}", "X-Session-ID": None},
-            # Extra headers that might confuse parsing
-            {
-                "Authorization": f"Bearer {test_api_key}",
-                "X-Session-ID": test_session_id,
-                "X-Forwarded-For": "malicious-ip",
-                "User-Agent": "'; DROP TABLE sessions; --",
+        response = client.post(
+            "/api/query",
+            headers={
+                k: v.format(api_key=test_api_key, session_id=test_session_id)
+                for k, v in headers.items()
             },
-        ]
-
-        for headers in malformed_headers:
-            # Filter None values as they can't be sent as headers
-            clean_headers = {k: v for k, v in headers.items() if v is not None}
-            clean_headers["Content-Type"] = "application/json"
-
-            response = client.post(
-                "/api/query", headers=clean_headers, json={"message": "test"}
-            )
-
-            # Should handle malformed headers gracefully
-            assert response.status_code in [200, 400, 403, 422]
+            json={"message": "test"},
+        )
 
-    def test_network_simulation_errors(
-        self, client: TestClient, session_headers, mock_session_store
-    ):
-        """Test handling of simulated network-related errors."""
-        mock_state = Mock()
-        mock_state.recent_messages = []
-        mock_session_store.get_state.return_value = mock_state
+        # Should handle malformed headers gracefully
+        assert response.status_code in [200, 400, 403, 422]
 
-        # Simulate various network errors in BAML client
-        network_errors = [
+    @pytest.mark.parametrize(
+        "error",
+        [
             ConnectionError("Connection refused"),
             TimeoutError("Request timed out"),
             OSError("Network unreachable"),
-        ]
+        ],
+        ids=lambda error: type(error).__name__,
+    )
+    def test_network_simulation_errors(
+        self,
+        client: TestClient,
+        session_headers,
+        mock_session_store,
+        mock_baml_client,
+        empty_state,
+        error,
+    ):
+        """Test handling of simulated network-related errors."""
+        mock_session_store.get_state.return_value = empty_state
 
-        for error in network_errors:
-            with patch("app.routers.queries.b") as mock_baml:
-                mock_baml.Chat = AsyncMock(side_effect=error)
+        # Simulate a network error in the BAML client
+        mock_baml_client.Chat = AsyncMock(side_effect=error)
 
-                response = client.post(
-                    "/api/query", headers=session_headers, json={"message": "test"}
-                )
+        response = client.post(
+            "/api/query", headers=session_headers, json={"message": "test"}
+        )
 
-                # Should handle network errors gracefully
-                assert response.status_code == 200
-                data = response.json()
-                assert "having trouble processing your request" in data["response"]
+        # Should handle network errors gracefully
+        assert response.status_code == 200
+        data = response.json()
+        assert "having trouble processing your request" in data["response"]
 
-    def test_endpoint_not_found(self, client: TestClient, auth_headers):
-        """Test accessing non-existent endpoints."""
-        non_existent_endpoints = [
+    @pytest.mark.parametrize(
+        "endpoint",
+        [
             "/api/nonexistent",
             "/api/health/detailed",
             "/api/sessions/extra/path",
             "/api/query/wrong",
             "/wrong/api/path",
             "/api/v2/health",  # Version that doesn't exist
-        ]
-
-        for endpoint in non_existent_endpoints:
-            response = client.get(endpoint, headers=auth_headers)
-            assert response.status_code == 404
+        ],
+    )
+    def test_endpoint_not_found(self, client: TestClient, auth_headers, endpoint):
+        """Test accessing non-existent endpoints."""
+        response = client.get(endpoint, headers=auth_headers)
+        assert response.status_code == 404
 
-    def test_http_method_not_allowed(
-        self, client: TestClient, auth_headers, test_session_id
-    ):
-        """Test using wrong HTTP methods on endpoints."""
-        wrong_method_tests = [
+    @pytest.mark.parametrize(
+        "endpoint,method",
+        [
             ("/api/health", "POST"),
             ("/api/health", "PUT"),
             ("/api/health", "DELETE"),
             ("/api/sessions", "GET"),
             ("/api/sessions", "PUT"),
             ("/api/sessions", "DELETE"),
-            (f"/api/sessions/{test_session_id}", "POST"),
-            (f"/api/sessions/{test_session_id}", "PUT"),
+            ("/api/sessions/test-session", "POST"),
+            ("/api/sessions/test-session", "PUT"),
             ("/api/query", "GET"),
             ("/api/query", "PUT"),
             ("/api/query", "DELETE"),
-        ]
-
-        for endpoint, method in wrong_method_tests:
-            response = client.request(method, endpoint, headers=auth_headers)
-            assert response.status_code == 405  # Method Not Allowed
+        ],
+    )
+    def test_http_method_not_allowed(
+        self, client: TestClient, auth_headers, endpoint, method
+    ):
+        """Test using wrong HTTP methods on endpoints."""
+        response = client.request(method, endpoint, headers=auth_headers)
+        assert response.status_code == 405  # Method Not Allowed
 
     def test_content_length_edge_cases(self, client: TestClient, session_headers):
         """Test edge cases with content length."""
@@ -415,8 +493,7 @@ class TestErrorHandling:
         self, client: TestClient, session_headers, invalid_content_type
     ):
         """Test endpoints with unsupported content types."""
-        headers = {**session_headers}
-        headers["Content-Type"] = invalid_content_type
+        headers = session_headers | {"Content-Type": invalid_content_type}
 
         response = client.post(
             "/api/query", headers=headers, content='{"message": "test"}'
@@ -5,6 +5,8 @@ This module tests end-to-end workflows that combine multiple endpoints
 and verify the complete user journey through the API.
 """
 
+import concurrent.futures
+import time
 from fastapi.testclient import TestClient
 from unittest.mock import Mock, patch, AsyncMock
 from baml_client.types import Message, AnalyticsQuestion, AnalyticsCategory
@@ -283,8 +285,6 @@ class TestIntegrationWorkflows:
         sample_state,
     ):
         """Test multiple concurrent sessions don't interfere with each other."""
-        import concurrent.futures
-
         def run_session_workflow(session_suffix):
             # Use proper State object from fixture
             with (
@@ -293,7 +293,8 @@ class TestIntegrationWorkflows:
                 patch("app.routers.queries.b") as local_baml,
             ):
 
-                local_store.get_state.return_value = sample_state
+                local_store.get_state = AsyncMock(return_value=sample_state)
+                local_store.delete_session = AsyncMock(return_value=None)
                 local_uuid.return_value = Mock()
                 local_uuid.return_value.__str__ = Mock(
                     return_value=f"session-{session_suffix}"
@@ -465,8 +466,6 @@ class TestIntegrationWorkflows:
         mock_uuid,
     ):
         """Test API performance with a realistic workflow."""
-        import time
-
         # Configure BAML mock
         response_msg = Message(role="assistant", content="Quick response")
         mock_baml_client.Chat = AsyncMock(return_value=response_msg)
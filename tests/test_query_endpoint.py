@@ -5,18 +5,42 @@ This module tests the main chatbot query functionality including
 BAML integration, analytics data loading, and error handling.
 """
 
+import asyncio
+import datetime
+import json
 import pytest
-from fastapi.testclient import TestClient
-from unittest.mock import Mock, patch, AsyncMock
+from fastapi import Request
+from httpx import AsyncClient
+from unittest.mock import Mock, AsyncMock
 from baml_client.types import Message, State, AnalyticsQuestion, AnalyticsCategory
+from app.models.requests import QueryRequest
+from app.routers import queries
+
+
+class FakeStream:
+    """Minimal stand-in for a BAML stream: yields partials, then a final result."""
+
+    def __init__(self, partials, final):
+        self._partials = partials
+        self._final = final
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for partial in self._partials:
+            yield partial
+
+    async def get_final_response(self):
+        return self._final
 
 
 class TestQueryEndpoint:
     """Test cases for the /api/query endpoint."""
 
-    def test_query_success_direct_message(
+    async def test_query_success_direct_message(
         self,
-        client: TestClient,
+        async_client: AsyncClient,
         session_headers,
         valid_query_payload,
         mock_session_store,
@@ -31,7 +55,7 @@ class TestQueryEndpoint:
         # Mock BAML client to return a direct message
         mock_baml_client.Chat = AsyncMock(return_value=sample_message)
 
-        response = client.post(
+        response = await async_client.post(
             "/api/query", headers=session_headers, json=valid_query_payload
         )
 
@@ -51,9 +75,9 @@ class TestQueryEndpoint:
         # Verify messages were added to state
         assert len(mock_state.recent_messages) == 2  # User message + assistant response
 
-    def test_query_success_analytics_question(
+    async def test_query_success_analytics_question(
         self,
-        client: TestClient,
+        async_client: AsyncClient,
         session_headers,
         valid_query_payload,
         mock_session_store,
@@ -73,7 +97,7 @@ class TestQueryEndpoint:
             return_value=sample_message
         )
 
-        response = client.post(
+        response = await async_client.post(
             "/api/query", headers=session_headers, json=valid_query_payload
         )
 
@@ -88,9 +112,9 @@ class TestQueryEndpoint:
         mock_analytics_loader.assert_called_once_with(AnalyticsCategory.USERS)
         mock_baml_client.AnswerAnalyticsQuestion.assert_called_once()
 
-    def test_query_analytics_no_data(
+    async def test_query_analytics_no_data(
         self,
-        client: TestClient,
+        async_client: AsyncClient,
         session_headers,
         valid_query_payload,
         mock_session_store,
@@ -109,7 +133,7 @@ class TestQueryEndpoint:
         # Mock analytics loader to return None (no data)
         mock_analytics_loader.return_value = None
 
-        response = client.post(
+        response = await async_client.post(
             "/api/query", headers=session_headers, json=valid_query_payload
         )
 
@@ -123,9 +147,9 @@ class TestQueryEndpoint:
         mock_baml_client.Chat.assert_called_once()
         mock_analytics_loader.assert_called_once_with(AnalyticsCategory.USERS)
 
-    def test_query_unexpected_response_type(
+    async def test_query_unexpected_response_type(
         self,
-        client: TestClient,
+        async_client: AsyncClient,
         session_headers,
         valid_query_payload,
         mock_session_store,
@@ -139,7 +163,7 @@ class TestQueryEndpoint:
         # Mock BAML to return unexpected type
         mock_baml_client.Chat = AsyncMock(return_value="unexpected_string")
 
-        response = client.post(
+        response = await async_client.post(
             "/api/query", headers=session_headers, json=valid_query_payload
         )
 
@@ -152,11 +176,11 @@ class TestQueryEndpoint:
         # Verify BAML was called
         mock_baml_client.Chat.assert_called_once()
 
-    def test_query_without_session_header(
-        self, client: TestClient, auth_headers, valid_query_payload
+    async def test_query_without_session_header(
+        self, async_client: AsyncClient, auth_headers, valid_query_payload
     ):
         """Test query without X-Session-ID header."""
-        response = client.post(
+        response = await async_client.post(
             "/api/query", headers=auth_headers, json=valid_query_payload
         )
 
@@ -164,58 +188,78 @@ class TestQueryEndpoint:
         data = response.json()
         assert "session" in data["detail"].lower()
 
-    def test_query_invalid_session_header(
-        self, client: TestClient, auth_headers, valid_query_payload
+    async def test_query_invalid_session_header(
+        self, async_client: AsyncClient, auth_headers, valid_query_payload
     ):
         """Test query with invalid X-Session-ID header."""
         headers = {**auth_headers, "X-Session-ID": ""}
 
-        response = client.post("/api/query", headers=headers, json=valid_query_payload)
+        response = await async_client.post(
+            "/api/query", headers=headers, json=valid_query_payload
+        )
 
         assert response.status_code == 400
         data = response.json()
         assert "session" in data["detail"].lower()
 
-    def test_query_missing_message(self, client: TestClient, session_headers):
+    async def test_query_missing_message(
+        self, async_client: AsyncClient, session_headers
+    ):
         """Test query with missing message field."""
         payload = {}
 
-        response = client.post("/api/query", headers=session_headers, json=payload)
+        response = await async_client.post(
+            "/api/query", headers=session_headers, json=payload
+        )
 
         assert response.status_code == 422  # Validation error
 
-    def test_query_empty_message(self, client: TestClient, session_headers):
+    async def test_query_empty_message(
+        self,
+        async_client: AsyncClient,
+        session_headers,
+        mock_session_store,
+        mock_baml_client,
+    ):
         """Test query with empty message field."""
         payload = {"message": ""}
 
         # Since the API doesn't validate empty strings as errors, test should pass
-        # But we need to mock the session store to avoid errors
-        with patch("app.routers.queries.session_store") as mock_store, \
-             patch("app.routers.queries.b") as mock_baml:
-            mock_state = State(recent_messages=[])
-            mock_store.get_state.return_value = mock_state
-            mock_baml.Chat = AsyncMock(return_value=Message(role="assistant", content="response"))
-            
-            response = client.post("/api/query", headers=session_headers, json=payload)
-            assert response.status_code == 200  # Empty messages are allowed
-
-    def test_query_non_string_message(self, client: TestClient, session_headers):
+        mock_session_store.sync_state(State(recent_messages=[]))
+        mock_baml_client.Chat = AsyncMock(
+            return_value=Message(role="assistant", content="response")
+        )
+
+        response = await async_client.post(
+            "/api/query", headers=session_headers, json=payload
+        )
+        assert response.status_code == 200  # Empty messages are allowed
+
+    async def test_query_non_string_message(
+        self, async_client: AsyncClient, session_headers
+    ):
         """Test query with non-string message field."""
         payload = {"message": 123}
 
-        response = client.post("/api/query", headers=session_headers, json=payload)
+        response = await async_client.post(
+            "/api/query", headers=session_headers, json=payload
+        )
 
         assert response.status_code == 422  # Validation error
 
-    def test_query_no_auth(self, client: TestClient, valid_query_payload):
+    async def test_query_no_auth(self, async_client: AsyncClient, valid_query_payload):
         """Test query without authentication."""
         headers = {"Content-Type": "application/json", "X-Session-ID": "test-session"}
 
-        response = client.post("/api/query", headers=headers, json=valid_query_payload)
+        response = await async_client.post(
+            "/api/query", headers=headers, json=valid_query_payload
+        )
 
         assert response.status_code == 403
 
-    def test_query_invalid_auth(self, client: TestClient, valid_query_payload):
+    async def test_query_invalid_auth(
+        self, async_client: AsyncClient, valid_query_payload
+    ):
         """Test query with invalid authentication."""
         headers = {
             "Authorization": "Bearer invalid-key",
@@ -223,13 +267,15 @@ class TestQueryEndpoint:
             "X-Session-ID": "test-session",
         }
 
-        response = client.post("/api/query", headers=headers, json=valid_query_payload)
+        response = await async_client.post(
+            "/api/query", headers=headers, json=valid_query_payload
+        )
 
         assert response.status_code == 403
 
-    def test_query_baml_error_handling(
+    async def test_query_baml_error_handling(
         self,
-        client: TestClient,
+        async_client: AsyncClient,
         session_headers,
         valid_query_payload,
         mock_session_store,
@@ -243,7 +289,7 @@ class TestQueryEndpoint:
         # Mock BAML to raise an exception
         mock_baml_client.Chat = AsyncMock(side_effect=Exception("BAML error"))
 
-        response = client.post(
+        response = await async_client.post(
             "/api/query", headers=session_headers, json=valid_query_payload
         )
 
@@ -252,9 +298,16 @@ class TestQueryEndpoint:
         data = response.json()
         assert "having trouble processing" in data["response"].lower()
 
-    def test_query_special_characters(
+        # The failed turn is saved once, under the same lock it was read under
+        assert len(mock_state.recent_messages) == 2
+        mock_session_store.get_state.assert_awaited_once()
+        mock_session_store.set_state.assert_awaited_once_with(
+            session_headers["X-Session-ID"], mock_state
+        )
+
+    async def test_query_special_characters(
         self,
-        client: TestClient,
+        async_client: AsyncClient,
         session_headers,
         mock_session_store,
         mock_baml_client,
@@ -269,7 +322,9 @@ class TestQueryEndpoint:
         mock_session_store.sync_state(mock_state)
         mock_baml_client.Chat = AsyncMock(return_value=sample_message)
 
-        response = client.post("/api/query", headers=session_headers, json=payload)
+        response = await async_client.post(
+            "/api/query", headers=session_headers, json=payload
+        )
 
         assert response.status_code == 200
 
@@ -278,9 +333,9 @@ class TestQueryEndpoint:
         assert user_message.content == special_message
         assert user_message.role == "user"
 
-    def test_query_state_management(
+    async def test_query_state_management(
         self,
-        client: TestClient,
+        async_client: AsyncClient,
         session_headers,
         mock_session_store,
         mock_baml_client,
@@ -298,7 +353,9 @@ class TestQueryEndpoint:
         mock_baml_client.Chat = AsyncMock(return_value=sample_message)
 
         payload = {"message": "New question"}
-        response = client.post("/api/query", headers=session_headers, json=payload)
+        response = await async_client.post(
+            "/api/query", headers=session_headers, json=payload
+        )
 
         assert response.status_code == 200
 
@@ -314,35 +371,41 @@ class TestQueryEndpoint:
         assert assistant_msg.role == "assistant"
         assert assistant_msg.content == sample_message.content
 
-    def test_query_http_methods(
-        self, client: TestClient, session_headers, valid_query_payload
+    async def test_query_http_methods(
+        self,
+        async_client: AsyncClient,
+        session_headers,
+        valid_query_payload,
+        mock_session_store,
+        mock_baml_client,
+        sample_message,
     ):
         """Test that query endpoint only accepts POST requests."""
         # Test POST (should work)
-        with patch("app.routers.queries.session_store"), patch("app.routers.queries.b"):
-            response = client.post(
-                "/api/query", headers=session_headers, json=valid_query_payload
-            )
-            # Don't check exact status since mocks aren't configured
-            assert response.status_code in [200, 500]  # Either works or fails due to mocks
+        mock_session_store.sync_state(State(recent_messages=[]))
+        mock_baml_client.Chat = AsyncMock(return_value=sample_message)
+        response = await async_client.post(
+            "/api/query", headers=session_headers, json=valid_query_payload
+        )
+        assert response.status_code == 200
 
         # Test GET (should fail)
-        response = client.get("/api/query", headers=session_headers)
+        response = await async_client.get("/api/query", headers=session_headers)
         assert response.status_code == 405  # Method not allowed
 
         # Test PUT (should fail)
-        response = client.put(
+        response = await async_client.put(
             "/api/query", headers=session_headers, json=valid_query_payload
         )
         assert response.status_code == 405
 
         # Test DELETE (should fail)
-        response = client.delete("/api/query", headers=session_headers)
+        response = await async_client.delete("/api/query", headers=session_headers)
         assert response.status_code == 405
 
-    def test_query_processing_time(
+    async def test_query_processing_time(
         self,
-        client: TestClient,
+        async_client: AsyncClient,
         session_headers,
         valid_query_payload,
         mock_session_store,
@@ -355,7 +418,7 @@ class TestQueryEndpoint:
         mock_session_store.sync_state(mock_state)
         mock_baml_client.Chat = AsyncMock(return_value=sample_message)
 
-        response = client.post(
+        response = await async_client.post(
             "/api/query", headers=session_headers, json=valid_query_payload
         )
 
@@ -368,9 +431,9 @@ class TestQueryEndpoint:
         assert data["processing_time_ms"] >= 0
         assert data["processing_time_ms"] < 10000  # Should be less than 10 seconds
 
-    def test_query_response_timestamp(
+    async def test_query_response_timestamp(
         self,
-        client: TestClient,
+        async_client: AsyncClient,
         session_headers,
         valid_query_payload,
         mock_session_store,
@@ -378,15 +441,13 @@ class TestQueryEndpoint:
         sample_message,
     ):
         """Test that query response includes timestamp."""
-        import datetime
-
         # Configure mocks
         mock_state = State(recent_messages=[])
         mock_session_store.sync_state(mock_state)
         mock_baml_client.Chat = AsyncMock(return_value=sample_message)
 
         before_request = datetime.datetime.now()
-        response = client.post(
+        response = await async_client.post(
             "/api/query", headers=session_headers, json=valid_query_payload
         )
         after_request = datetime.datetime.now()
@@ -397,15 +458,17 @@ class TestQueryEndpoint:
         # Verify timestamp is included and reasonable
         assert "timestamp" in data
         timestamp_str = data["timestamp"]
-        timestamp = datetime.datetime.fromisoformat(timestamp_str.replace("Z", "+00:00"))
+        timestamp = datetime.datetime.fromisoformat(
+            timestamp_str.replace("Z", "+00:00")
+        )
 
         # Timestamp should be between request start and end (with some tolerance)
         assert (timestamp.replace(tzinfo=None) - before_request).total_seconds() >= -1
         assert (after_request - timestamp.replace(tzinfo=None)).total_seconds() >= -1
 
-    def test_query_large_message(
+    async def test_query_large_message(
         self,
-        client: TestClient,
+        async_client: AsyncClient,
         session_headers,
         mock_session_store,
         mock_baml_client,
@@ -421,7 +484,9 @@ class TestQueryEndpoint:
         mock_session_store.sync_state(mock_state)
         mock_baml_client.Chat = AsyncMock(return_value=sample_message)
 
-        response = client.post("/api/query", headers=session_headers, json=payload)
+        response = await async_client.post(
+            "/api/query", headers=session_headers, json=payload
+        )
 
         assert response.status_code == 200
 
@@ -430,9 +495,9 @@ class TestQueryEndpoint:
         assert user_message.content == large_message
         assert len(user_message.content) > 20000
 
-    def test_query_concurrent_requests(
+    async def test_query_concurrent_requests(
         self,
-        client: TestClient,
+        async_client: AsyncClient,
         session_headers,
         valid_query_payload,
         mock_session_store,
@@ -440,10 +505,6 @@ class TestQueryEndpoint:
         sample_message,
     ):
         """Test concurrent query requests to the same session."""
-        import concurrent.futures
-        import time
-        import asyncio
-
         # Configure mocks
         mock_state = State(recent_messages=[])
         mock_session_store.sync_state(mock_state)
@@ -455,15 +516,15 @@ class TestQueryEndpoint:
 
         mock_baml_client.Chat = AsyncMock(side_effect=delayed_response)
 
-        def make_request():
-            return client.post(
-                "/api/query", headers=session_headers, json=valid_query_payload
+        # Make 3 concurrent requests on one event loop
+        responses = await asyncio.gather(
+            *(
+                async_client.post(
+                    "/api/query", headers=session_headers, json=valid_query_payload
+                )
+                for _ in range(3)
             )
-
-        # Make 3 concurrent requests
-        with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
-            futures = [executor.submit(make_request) for _ in range(3)]
-            responses = [future.result() for future in futures]
+        )
 
         # All requests should succeed
         for response in responses:
@@ -472,3 +533,171 @@ class TestQueryEndpoint:
         # The session state should have been updated multiple times
         # (6 messages: 3 user + 3 assistant)
         assert len(mock_state.recent_messages) >= 6
+
+    async def test_stream_query_direct_message(
+        self,
+        async_client: AsyncClient,
+        session_headers,
+        valid_query_payload,
+        mock_session_store,
+        mock_baml_client,
+        sample_message,
+    ):
+        """Test that the streaming endpoint emits deltas followed by a done event."""
+        mock_state = State(recent_messages=[])
+        mock_session_store.sync_state(mock_state)
+
+        content = sample_message.content
+        partials = [Mock(content=content[:5]), Mock(content=content[:12])]
+        mock_baml_client.stream.Chat = Mock(
+            return_value=FakeStream(partials, sample_message)
+        )
+
+        response = await async_client.post(
+            "/api/query/stream", headers=session_headers, json=valid_query_payload
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+
+        events = [e for e in response.text.split("\n\n") if e]
+        deltas = [json.loads(e[len("data: ") :])["delta"] for e in events[:-1]]
+        assert "".join(deltas) == content
+
+        assert events[-1].startswith("event: done\n")
+        done = json.loads(events[-1].split("data: ", 1)[1])
+        assert done["response"] == content
+        assert "processing_time_ms" in done
+
+        # User message + assistant response
+        assert len(mock_state.recent_messages) == 2
+
+    async def test_stream_query_analytics_question(
+        self,
+        async_client: AsyncClient,
+        session_headers,
+        valid_query_payload,
+        mock_session_store,
+        mock_baml_client,
+        mock_analytics_loader,
+        sample_analytics_question,
+        sample_message,
+    ):
+        """Test that analytics questions stream the analytics answer."""
+        mock_state = State(recent_messages=[])
+        mock_session_store.sync_state(mock_state)
+
+        mock_baml_client.stream.Chat = Mock(
+            return_value=FakeStream([], sample_analytics_question)
+        )
+        mock_baml_client.stream.AnswerAnalyticsQuestion = Mock(
+            return_value=FakeStream([], sample_message)
+        )
+
+        response = await async_client.post(
+            "/api/query/stream", headers=session_headers, json=valid_query_payload
+        )
+
+        assert response.status_code == 200
+        assert f'"delta":"{sample_message.content}"' in response.text
+        mock_baml_client.stream.AnswerAnalyticsQuestion.assert_called_once()
+        mock_analytics_loader.assert_called_once()
+
+    async def test_stream_query_baml_error(
+        self,
+        async_client: AsyncClient,
+        session_headers,
+        valid_query_payload,
+        mock_session_store,
+        mock_baml_client,
+    ):
+        """Test that failures mid-stream end with an error event."""
+        mock_state = State(recent_messages=[])
+        mock_session_store.sync_state(mock_state)
+
+        mock_baml_client.stream.Chat = Mock(side_effect=Exception("BAML error"))
+
+        response = await async_client.post(
+            "/api/query/stream", headers=session_headers, json=valid_query_payload
+        )
+
+        assert response.status_code == 200
+        assert "event: error\n" in response.text
+
+    async def test_stream_query_timeout(
+        self,
+        async_client: AsyncClient,
+        session_headers,
+        valid_query_payload,
+        mock_session_store,
+        mock_baml_client,
+        sample_message,
+        monkeypatch,
+    ):
+        """Test that a stalled stream is cut off and ends with an error event."""
+        mock_state = State(recent_messages=[])
+        mock_session_store.sync_state(mock_state)
+        monkeypatch.setattr(queries, "LLM_TIMEOUT_SECONDS", 0.05)
+
+        class StalledStream(FakeStream):
+            async def _iterate(self):
+                await asyncio.sleep(10)
+                yield sample_message
+
+        mock_baml_client.stream.Chat = Mock(
+            return_value=StalledStream([], sample_message)
+        )
+
+        response = await async_client.post(
+            "/api/query/stream", headers=session_headers, json=valid_query_payload
+        )
+
+        assert response.status_code == 200
+        assert "event: error\n" in response.text
+
+        # User message + error response
+        assert len(mock_state.recent_messages) == 2
+
+    async def test_stream_query_client_disconnect(
+        self,
+        session_headers,
+        mock_session_store,
+        mock_baml_client,
+        sample_message,
+    ):
+        """Test that a disconnect mid-stream still leaves a complete turn stored."""
+        mock_state = State(recent_messages=[])
+        mock_session_store.sync_state(mock_state)
+
+        class StalledStream(FakeStream):
+            async def _iterate(self):
+                yield Mock(content="Partial")
+                await asyncio.sleep(10)
+
+        mock_baml_client.stream.Chat = Mock(
+            return_value=StalledStream([], sample_message)
+        )
+
+        request = Request(
+            {
+                "type": "http",
+                "headers": [
+                    (b"x-session-id", session_headers["X-Session-ID"].encode())
+                ],
+            }
+        )
+        response = await queries.stream_query(
+            request, QueryRequest(message="Hello"), api_key="unused"
+        )
+
+        # Read the first delta, then drop the connection
+        body = response.body_iterator
+        assert b'"delta":"Partial"' in await body.__anext__()
+        await body.aclose()
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+        # User message + error response, saved like any failed turn
+        roles = [m.role for m in mock_state.recent_messages]
+        assert roles == ["user", "assistant"]
+        mock_session_store.set_state.assert_awaited_once()
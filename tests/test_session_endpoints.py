@@ -5,6 +5,7 @@ This module tests the session creation, retrieval, and deletion endpoints
 to ensure proper session management functionality and state handling.
 """
 
+import concurrent.futures
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import Mock, patch
@@ -325,8 +326,6 @@ class TestSessionEndpoints:
         self, client: TestClient, auth_headers, mock_session_store
     ):
         """Test concurrent session operations."""
-        import concurrent.futures
-
         mock_state = Mock(spec=State)
         mock_state.recent_messages = []
         mock_session_store.get_state.return_value = mock_state